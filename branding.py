@@ -2,6 +2,7 @@
 
 import html as _html
 import json
+import re
 import streamlit as st
 
 # ── Color Palette ─────────────────────────────────────────────────────────────
@@ -443,12 +444,18 @@ BRANDED_CSS = """<style>
     }
 </style>"""
 
+# Comment- and whitespace-stripped once at import; this is what gets sent on every rerun
+_BRANDED_CSS_MIN = re.sub(
+    r"\s*([{};])\s*", r"\1",
+    re.sub(r"\s+", " ", re.sub(r"/\*.*?\*/", "", BRANDED_CSS, flags=re.S)),
+).strip()
+
 
 # ── Helper Functions ──────────────────────────────────────────────────────────
 
 def inject_branding():
     """Inject the branded CSS into the current page."""
-    st.markdown(BRANDED_CSS, unsafe_allow_html=True)
+    st.markdown(_BRANDED_CSS_MIN, unsafe_allow_html=True)
 
 
 def sidebar_brand():
@@ -27,7 +27,8 @@ def _clear_caches():
     try:
         for fn in (get_stats, get_contact_stats, get_grade_distribution,
                    get_tier_completeness_stats, get_all_fetch_status,
-                   get_all_states, get_all_business_types, get_yelp_stats):
+                   get_all_states, get_all_business_types, get_yelp_stats,
+                   get_business_by_id, get_map_data, get_all_businesses_with_coords):
             fn.clear()
     except Exception:
         pass
@@ -206,10 +207,26 @@ def get_connection():
 
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
+    # WAL lets dashboard reads run alongside a fetch's writes, and NORMAL
+    # syncs once per checkpoint instead of on every commit
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
     return conn
 
 
+_schema_ready = False
+
+
 def create_tables():
+    """Create tables/indexes and run column migrations (once per process).
+
+    Every page calls this on each Streamlit rerun; after the first call the
+    schema is known to exist, so later calls return immediately.
+    """
+    global _schema_ready
+    if _schema_ready:
+        return
+
     conn = get_connection()
     cursor = conn.cursor()
 
@@ -284,10 +301,23 @@ def create_tables():
         )
     """)
 
+    # Last Yelp search result per normalized (name, city, state); a NULL
+    # rating records a search that found nothing
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS yelp_cache (
+            key TEXT PRIMARY KEY,
+            yelp_rating REAL,
+            yelp_review_count INTEGER,
+            yelp_url TEXT,
+            fetched_at TEXT NOT NULL
+        )
+    """)
+
     _migrate_columns(conn)
 
     conn.commit()
     conn.close()
+    _schema_ready = True
 
 
 def _migrate_columns(conn):
@@ -298,6 +328,8 @@ def _migrate_columns(conn):
         ("businesses", "yelp_rating", "REAL"),
         ("businesses", "yelp_review_count", "INTEGER"),
         ("businesses", "yelp_url", "TEXT"),
+        # Derived by SQLite on every write, so no code path can leave it stale
+        ("businesses", "confidence_grade", f"TEXT GENERATED ALWAYS AS ({_GRADE_SQL}) VIRTUAL"),
     ]
     cursor = conn.cursor()
     for table, column, col_type in migrations:
@@ -305,6 +337,11 @@ def _migrate_columns(conn):
             cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {col_type}")
         except Exception:
             pass  # column already exists
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_confidence_grade ON businesses(confidence_grade)")
+    # Yelp enrichment only ever scans rows that have no rating yet
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_yelp_pending ON businesses(id) WHERE yelp_rating IS NULL"
+    )
 
 
 def upsert_business(business: dict):
@@ -447,6 +484,7 @@ def complete_fetch_log(log_id, status="completed", records_fetched=0,
     ))
     conn.commit()
     conn.close()
+    _clear_caches()  # a finished fetch changes every dashboard aggregate
 
 
 def get_last_fetch(source):
@@ -477,6 +515,13 @@ def get_all_fetch_status():
     """)
     rows = [dict(row) for row in cursor.fetchall()]
     conn.close()
+    # Parse timestamps once here so callers can show freshness without re-parsing
+    now = datetime.now()
+    for row in rows:
+        try:
+            row["days_ago"] = (now - datetime.fromisoformat(row["completed_at"])).days
+        except (ValueError, TypeError):
+            row["days_ago"] = None
     return rows
 
 
@@ -526,8 +571,35 @@ def upsert_business_cross_source(business: dict):
     """
     conn = get_connection()
     cursor = conn.cursor()
+    status = _upsert_cross_source(cursor, business, datetime.now().isoformat())
+    if status != "unchanged":
+        conn.commit()
+    conn.close()
+    return status
+
+
+def upsert_businesses_cross_source(businesses):
+    """Batch version of upsert_business_cross_source.
+
+    Runs every upsert on one connection and commits once at the end, so a
+    page of results costs one transaction instead of one per row.
+    Returns a list of 'new' / 'updated' / 'unchanged', one per business.
+    """
+    if not businesses:
+        return []
+    conn = get_connection()
+    cursor = conn.cursor()
     now = datetime.now().isoformat()
+    try:
+        statuses = [_upsert_cross_source(cursor, b, now) for b in businesses]
+        conn.commit()
+    finally:
+        conn.close()
+    return statuses
+
 
+def _upsert_cross_source(cursor, business, now):
+    """Match/merge/insert one business on an open cursor. Does not commit."""
     existing = None
 
     # 1. Try UEI match
@@ -596,11 +668,8 @@ def upsert_business_cross_source(business: dict):
             set_clause = ", ".join(f"{k} = ?" for k in updates)
             values = list(updates.values()) + [existing["id"]]
             cursor.execute(f"UPDATE businesses SET {set_clause} WHERE id = ?", values)
-            conn.commit()
-            conn.close()
             return "updated"
         else:
-            conn.close()
             return "unchanged"
     else:
         # Insert new record
@@ -641,8 +710,6 @@ def upsert_business_cross_source(business: dict):
             now, now,
             business.get("notes"),
         ))
-        conn.commit()
-        conn.close()
         return "new"
 
 
@@ -651,26 +718,47 @@ def get_stats():
     conn = get_connection()
     cursor = conn.cursor()
 
-    stats = {}
-    cursor.execute("SELECT COUNT(*) FROM businesses")
-    stats["total"] = cursor.fetchone()[0]
-
-    cursor.execute("SELECT business_type, COUNT(*) FROM businesses GROUP BY business_type")
-    stats["by_type"] = {row[0]: row[1] for row in cursor.fetchall()}
-
-    cursor.execute("SELECT state, COUNT(*) FROM businesses GROUP BY state ORDER BY COUNT(*) DESC")
-    stats["by_state"] = {row[0]: row[1] for row in cursor.fetchall()}
-
-    cursor.execute("SELECT source, COUNT(*) FROM businesses GROUP BY source")
-    stats["by_source"] = {row[0]: row[1] for row in cursor.fetchall()}
-
+    # All rollups in one statement (one round-trip on Turso); rows are tagged
+    # with the dimension they belong to.
     cursor.execute("""
-        SELECT ROUND(distance_miles/25)*25 as bracket, COUNT(*)
+        SELECT 'type', business_type, COUNT(*) FROM businesses GROUP BY business_type
+        UNION ALL
+        SELECT 'state', state, COUNT(*) FROM businesses GROUP BY state
+        UNION ALL
+        SELECT 'source', source, COUNT(*) FROM businesses GROUP BY source
+        UNION ALL
+        SELECT 'distance', ROUND(distance_miles/25)*25, COUNT(*)
+        FROM businesses WHERE distance_miles IS NOT NULL
+        GROUP BY ROUND(distance_miles/25)*25
+        UNION ALL
+        SELECT 'sdvosb', NULL,
+               SUM(CASE WHEN business_type LIKE '%Service Disabled%' THEN 1 ELSE 0 END)
+        FROM businesses
+        UNION ALL
+        SELECT 'vob', NULL,
+               SUM(CASE WHEN business_type != '' AND business_type NOT LIKE '%Service Disabled%'
+                   THEN 1 ELSE 0 END)
         FROM businesses
-        WHERE distance_miles IS NOT NULL
-        GROUP BY bracket ORDER BY bracket
     """)
-    stats["by_distance"] = {f"{int(row[0])}-{int(row[0])+25}mi": row[1] for row in cursor.fetchall()}
+    groups = {"type": [], "state": [], "source": [], "distance": []}
+    counts = {}
+    for dim, key, count in cursor.fetchall():
+        if dim in groups:
+            groups[dim].append((key, count))
+        else:
+            counts[dim] = count or 0
+
+    stats = {
+        "total": sum(c for _, c in groups["type"]),
+        "sdvosb_count": counts.get("sdvosb", 0),
+        "vob_count": counts.get("vob", 0),
+        "by_type": dict(groups["type"]),
+        "by_state": dict(sorted(groups["state"], key=lambda kc: kc[1], reverse=True)),
+        "by_source": dict(groups["source"]),
+        "by_distance": {
+            f"{int(b)}-{int(b)+25}mi": c for b, c in sorted(groups["distance"])
+        },
+    }
 
     conn.close()
     return stats
@@ -833,6 +921,7 @@ def export_search_to_csv(query="", state="", business_type="", max_distance=None
     return rows
 
 
+@_cache_short
 def get_business_by_id(business_id):
     conn = get_connection()
     cursor = conn.cursor()
@@ -857,45 +946,109 @@ def get_businesses_by_ids(ids):
     return rows
 
 
-def get_map_data(max_distance=None):
+def _fetch_dicts(cursor):
+    """Return remaining rows as dicts, zipping plain tuples with the column names.
+
+    Cheaper than dict(sqlite3.Row) for large result sets; set
+    cursor.row_factory = None before executing to get plain tuples.
+    """
+    columns = [d[0] for d in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+# The 17 fields scored by branding.compute_completeness_pct
+_COMPLETENESS_FIELDS = (
+    "legal_business_name", "dba_name", "business_type",
+    "physical_address_line1", "city", "state", "zip_code",
+    "phone", "email", "website",
+    "naics_codes", "naics_descriptions",
+    "uei", "cage_code",
+    "registration_status", "owner_name", "service_branch",
+)
+
+
+def _filled_sql(column):
+    return f"([{column}] IS NOT NULL AND [{column}] != '')"
+
+
+# SQL mirror of branding.assign_confidence_grade: A>=70%, B>=50%, C>=30%, D>=15%, else F
+_COMPLETENESS_PCT_SQL = "ROUND(({}) * 100.0 / {})".format(
+    " + ".join(f"(CASE WHEN {_filled_sql(f)} THEN 1 ELSE 0 END)" for f in _COMPLETENESS_FIELDS),
+    len(_COMPLETENESS_FIELDS),
+)
+_GRADE_SQL = f"""CASE
+    WHEN {_COMPLETENESS_PCT_SQL} >= 70 THEN 'A'
+    WHEN {_COMPLETENESS_PCT_SQL} >= 50 THEN 'B'
+    WHEN {_COMPLETENESS_PCT_SQL} >= 30 THEN 'C'
+    WHEN {_COMPLETENESS_PCT_SQL} >= 15 THEN 'D'
+    ELSE 'F'
+END"""
+
+
+def _quality_filter_sql(tiers=(), grades=()):
+    """WHERE fragments + params requiring data in every tier and a grade in grades.
+
+    Same semantics as filtering rows with branding.tier_has_data and
+    branding.assign_confidence_grade, but evaluated by the database
+    (grades via the indexed confidence_grade column).
+    """
+    from branding import TRUST_TIERS
+
+    clauses, params = [], []
+    for tier_key in tiers:
+        clauses.append("(" + " OR ".join(_filled_sql(f) for f in TRUST_TIERS[tier_key]["fields"]) + ")")
+    if grades:
+        clauses.append(f"confidence_grade IN ({', '.join('?' * len(grades))})")
+        params.extend(grades)
+    return clauses, params
+
+
+@_cache_short
+def get_map_data(max_distance=None, tiers=(), grades=()):
     conn = get_connection()
     cursor = conn.cursor()
+    cursor.row_factory = None
 
     _map_cols = """id, legal_business_name, dba_name, city, state, zip_code,
                    business_type, distance_miles, latitude, longitude,
                    phone, email, website,
                    uei, cage_code, registration_status, naics_codes,
                    naics_descriptions, registration_expiration,
-                   entity_start_date, source"""
+                   entity_start_date, source, confidence_grade"""
 
+    where, params = _quality_filter_sql(tiers, grades)
+    where.insert(0, "latitude IS NOT NULL AND longitude IS NOT NULL")
     if max_distance:
-        cursor.execute(f"""
-            SELECT {_map_cols}
-            FROM businesses
-            WHERE latitude IS NOT NULL AND longitude IS NOT NULL
-              AND distance_miles <= ?
-        """, (max_distance,))
-    else:
-        cursor.execute(f"""
-            SELECT {_map_cols}
-            FROM businesses
-            WHERE latitude IS NOT NULL AND longitude IS NOT NULL
-        """)
+        where.append("distance_miles <= ?")
+        params.append(max_distance)
 
-    rows = [dict(row) for row in cursor.fetchall()]
+    cursor.execute(f"""
+        SELECT {_map_cols}
+        FROM businesses
+        WHERE {" AND ".join(where)}
+    """, params)
+
+    rows = _fetch_dicts(cursor)
     conn.close()
     return rows
 
 
-def get_all_businesses_with_coords():
-    """Fetch all businesses that have coordinates, for custom-location search."""
+@_cache_long
+def get_all_businesses_with_coords(tiers=(), grades=()):
+    """Fetch all businesses that have coordinates, for custom-location search.
+
+    tiers / grades optionally restrict rows the same way as get_map_data.
+    """
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute("""
+    cursor.row_factory = None
+    where, params = _quality_filter_sql(tiers, grades)
+    where.insert(0, "latitude IS NOT NULL AND longitude IS NOT NULL")
+    cursor.execute(f"""
         SELECT * FROM businesses
-        WHERE latitude IS NOT NULL AND longitude IS NOT NULL
-    """)
-    rows = [dict(row) for row in cursor.fetchall()]
+        WHERE {" AND ".join(where)}
+    """, params)
+    rows = _fetch_dicts(cursor)
     conn.close()
     return rows
 
@@ -982,14 +1135,14 @@ def update_business_fields(business_id, fields: dict):
 def get_contact_stats():
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM businesses")
-    total = cursor.fetchone()[0]
-    cursor.execute("SELECT COUNT(*) FROM businesses WHERE phone IS NOT NULL AND phone != ''")
-    has_phone = cursor.fetchone()[0]
-    cursor.execute("SELECT COUNT(*) FROM businesses WHERE email IS NOT NULL AND email != ''")
-    has_email = cursor.fetchone()[0]
-    cursor.execute("SELECT COUNT(*) FROM businesses WHERE website IS NOT NULL AND website != ''")
-    has_website = cursor.fetchone()[0]
+    cursor.execute(f"""
+        SELECT COUNT(*),
+               SUM(CASE WHEN {_filled_sql("phone")} THEN 1 ELSE 0 END),
+               SUM(CASE WHEN {_filled_sql("email")} THEN 1 ELSE 0 END),
+               SUM(CASE WHEN {_filled_sql("website")} THEN 1 ELSE 0 END)
+        FROM businesses
+    """)
+    total, has_phone, has_email, has_website = (v or 0 for v in cursor.fetchone())
     conn.close()
     return {
         "total": total,
@@ -1010,44 +1163,11 @@ def get_grade_distribution():
     """
     conn = get_connection()
     cursor = conn.cursor()
-    # Count filled fields out of the 17 scored fields, compute percentage,
-    # then bucket into grades: A>=70%, B>=50%, C>=30%, D>=15%, F<15%
+    # confidence_grade is a generated column (see _GRADE_SQL); counting it uses idx_confidence_grade
     cursor.execute("""
-        SELECT
-            CASE
-                WHEN pct >= 70 THEN 'A'
-                WHEN pct >= 50 THEN 'B'
-                WHEN pct >= 30 THEN 'C'
-                WHEN pct >= 15 THEN 'D'
-                ELSE 'F'
-            END as grade,
-            COUNT(*) as cnt
-        FROM (
-            SELECT ROUND(
-                (
-                    (CASE WHEN legal_business_name IS NOT NULL AND legal_business_name != '' THEN 1 ELSE 0 END)
-                  + (CASE WHEN dba_name IS NOT NULL AND dba_name != '' THEN 1 ELSE 0 END)
-                  + (CASE WHEN business_type IS NOT NULL AND business_type != '' THEN 1 ELSE 0 END)
-                  + (CASE WHEN physical_address_line1 IS NOT NULL AND physical_address_line1 != '' THEN 1 ELSE 0 END)
-                  + (CASE WHEN city IS NOT NULL AND city != '' THEN 1 ELSE 0 END)
-                  + (CASE WHEN state IS NOT NULL AND state != '' THEN 1 ELSE 0 END)
-                  + (CASE WHEN zip_code IS NOT NULL AND zip_code != '' THEN 1 ELSE 0 END)
-                  + (CASE WHEN phone IS NOT NULL AND phone != '' THEN 1 ELSE 0 END)
-                  + (CASE WHEN email IS NOT NULL AND email != '' THEN 1 ELSE 0 END)
-                  + (CASE WHEN website IS NOT NULL AND website != '' THEN 1 ELSE 0 END)
-                  + (CASE WHEN naics_codes IS NOT NULL AND naics_codes != '' THEN 1 ELSE 0 END)
-                  + (CASE WHEN naics_descriptions IS NOT NULL AND naics_descriptions != '' THEN 1 ELSE 0 END)
-                  + (CASE WHEN uei IS NOT NULL AND uei != '' THEN 1 ELSE 0 END)
-                  + (CASE WHEN cage_code IS NOT NULL AND cage_code != '' THEN 1 ELSE 0 END)
-                  + (CASE WHEN registration_status IS NOT NULL AND registration_status != '' THEN 1 ELSE 0 END)
-                  + (CASE WHEN owner_name IS NOT NULL AND owner_name != '' THEN 1 ELSE 0 END)
-                  + (CASE WHEN service_branch IS NOT NULL AND service_branch != '' THEN 1 ELSE 0 END)
-                ) * 100.0 / 17
-            ) as pct
-            FROM businesses
-        )
-        GROUP BY grade
-        ORDER BY grade
+        SELECT confidence_grade, COUNT(*)
+        FROM businesses
+        GROUP BY confidence_grade
     """)
     result = {row[0]: row[1] for row in cursor.fetchall()}
     conn.close()
@@ -1068,14 +1188,21 @@ def get_tier_completeness_stats():
     """
     from branding import TRUST_TIERS
 
+    all_fields = [f for tier_info in TRUST_TIERS.values() for f in tier_info["fields"]]
+
+    # Every field's filled count in one scan (one round-trip on Turso)
     conn = get_connection()
     cursor = conn.cursor()
-
-    cursor.execute("SELECT COUNT(*) FROM businesses")
-    total_biz = cursor.fetchone()[0]
-    if total_biz == 0:
-        conn.close()
+    cursor.execute(
+        "SELECT COUNT(*), "
+        + ", ".join(f"SUM(CASE WHEN {_filled_sql(f)} THEN 1 ELSE 0 END)" for f in all_fields)
+        + " FROM businesses"
+    )
+    total_biz, *filled_counts = cursor.fetchone()
+    conn.close()
+    if not total_biz:
         return {}
+    filled_by_field = dict(zip(all_fields, filled_counts))
 
     result = {}
     for tier_key, tier_info in TRUST_TIERS.items():
@@ -1084,10 +1211,7 @@ def get_tier_completeness_stats():
         total_filled_pct = 0.0
 
         for field in fields:
-            cursor.execute(
-                f"SELECT COUNT(*) FROM businesses WHERE [{field}] IS NOT NULL AND [{field}] != ''",
-            )
-            count = cursor.fetchone()[0]
+            count = filled_by_field[field] or 0
             pct = round(count / total_biz * 100)
             field_pcts[field] = pct
             total_filled_pct += pct
@@ -1103,7 +1227,6 @@ def get_tier_completeness_stats():
             "fields": field_pcts,
         }
 
-    conn.close()
     return result
 
 
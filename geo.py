@@ -4,6 +4,9 @@ Uses pgeocode for offline zip-to-coordinates lookup and Haversine formula.
 """
 
 import math
+from functools import lru_cache
+
+import numpy as np
 import pgeocode
 
 from config import ACTIVE_HEROES_LAT, ACTIVE_HEROES_LON, SEARCH_RADIUS_MILES
@@ -20,6 +23,7 @@ def haversine_miles(lat1, lon1, lat2, lon2):
     return 2 * R * math.asin(math.sqrt(a))
 
 
+@lru_cache(maxsize=4096)
 def zip_to_coords(zip_code: str):
     result = _nomi.query_postal_code(zip_code)
     if result is not None and not math.isnan(result.latitude):
@@ -27,11 +31,38 @@ def zip_to_coords(zip_code: str):
     return None, None
 
 
+def haversine_miles_np(lat1, lon1, lat2, lon2):
+    """Vectorized haversine_miles over NumPy arrays (scalars broadcast)."""
+    R = 3958.8
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * R * np.arcsin(np.sqrt(a))
+
+
+@lru_cache(maxsize=1)
+def _hq_zip_table():
+    """Map every US zip5 to (lat, lon, miles from HQ).
+
+    Built once per process in a single vectorized pass over pgeocode's
+    postal code table, so ingest runs never geocode a zip one at a time.
+    """
+    df = _nomi._data_frame.dropna(subset=["latitude", "longitude"])
+    lats = df["latitude"].to_numpy(dtype=float)
+    lons = df["longitude"].to_numpy(dtype=float)
+    dists = haversine_miles_np(ACTIVE_HEROES_LAT, ACTIVE_HEROES_LON, lats, lons)
+    return {
+        z: (lat, lon, dist)
+        for z, lat, lon, dist in zip(df["postal_code"], lats.tolist(), lons.tolist(), dists.tolist())
+    }
+
+
+def _hq_lookup(zip5: str):
+    """Return (lat, lon, miles from HQ) for a zip5, or (None, None, None)."""
+    return _hq_zip_table().get(zip5, (None, None, None))
+
+
 def distance_from_active_heroes(zip_code: str):
-    lat, lon = zip_to_coords(zip_code)
-    if lat is None:
-        return None
-    return haversine_miles(ACTIVE_HEROES_LAT, ACTIVE_HEROES_LON, lat, lon)
+    return _hq_lookup(zip_code)[2]
 
 
 def is_within_radius(zip_code: str, radius=SEARCH_RADIUS_MILES):
@@ -44,17 +75,17 @@ def is_within_radius(zip_code: str, radius=SEARCH_RADIUS_MILES):
 def geocode_business(business: dict) -> dict:
     """Add lat/lon from zip code and compute distance_miles from Active Heroes HQ.
 
+    Coordinates depend only on the zip5, which is resolved from the
+    precomputed zip table, so there is nothing further to cache per address.
     Modifies and returns the business dict in-place.
     """
-    zip_code = (business.get("zip_code") or "")[:5]
+    zip_code = (business.get("zip_code") or "").strip()[:5]
     if zip_code and not business.get("latitude"):
-        lat, lon = zip_to_coords(zip_code)
+        lat, lon, dist = _hq_lookup(zip_code)
         if lat is not None:
             business["latitude"] = lat
             business["longitude"] = lon
-            business["distance_miles"] = round(
-                haversine_miles(ACTIVE_HEROES_LAT, ACTIVE_HEROES_LON, lat, lon), 1
-            )
+            business["distance_miles"] = round(dist, 1)
     return business
 
 
@@ -74,10 +105,10 @@ def batch_geocode_missing():
     rows = cursor.fetchall()
     updated = 0
     for row in rows:
-        zip5 = (row["zip_code"] or "")[:5]
-        lat, lon = zip_to_coords(zip5)
+        zip5 = (row["zip_code"] or "").strip()[:5]
+        lat, lon, dist = _hq_lookup(zip5)
         if lat is not None:
-            dist = round(haversine_miles(ACTIVE_HEROES_LAT, ACTIVE_HEROES_LON, lat, lon), 1)
+            dist = round(dist, 1)
             cursor.execute(
                 "UPDATE businesses SET latitude = ?, longitude = ?, distance_miles = ? WHERE id = ?",
                 (lat, lon, dist, row["id"]),
@@ -88,22 +119,44 @@ def batch_geocode_missing():
     return updated
 
 
+def _coord_arrays(businesses):
+    """Return (businesses with coordinates, their latitudes, their longitudes as arrays)."""
+    located = [b for b in businesses if b.get("latitude") is not None and b.get("longitude") is not None]
+    lats = np.fromiter((b["latitude"] for b in located), dtype=float, count=len(located))
+    lons = np.fromiter((b["longitude"] for b in located), dtype=float, count=len(located))
+    return located, lats, lons
+
+
+def _with_distances(located, indices, dists):
+    """Copies of located[i] for each index, in order, with custom_distance_miles added."""
+    return [
+        {**located[i], "custom_distance_miles": d}
+        for i, d in zip(indices.tolist(), dists.tolist())
+    ]
+
+
 def compute_distances_from_point(origin_lat, origin_lon, businesses):
     """Return copies of business dicts with custom_distance_miles added, sorted by distance."""
-    results = []
-    for biz in businesses:
-        lat, lon = biz.get("latitude"), biz.get("longitude")
-        if lat is None or lon is None:
-            continue
-        dist = round(haversine_miles(origin_lat, origin_lon, lat, lon), 1)
-        entry = dict(biz)
-        entry["custom_distance_miles"] = dist
-        results.append(entry)
-    results.sort(key=lambda b: b["custom_distance_miles"])
-    return results
+    located, lats, lons = _coord_arrays(businesses)
+    dists = np.round(haversine_miles_np(origin_lat, origin_lon, lats, lons), 1)
+    order = np.argsort(dists, kind="stable")
+    return _with_distances(located, order, dists[order])
 
 
 def filter_by_custom_radius(origin_lat, origin_lon, businesses, radius_miles):
     """Compute distances from origin and return only those within radius_miles."""
-    with_distances = compute_distances_from_point(origin_lat, origin_lon, businesses)
-    return [b for b in with_distances if b["custom_distance_miles"] <= radius_miles]
+    located, lats, lons = _coord_arrays(businesses)
+
+    # Cheap lat/lon bounding box first; haversine only runs on rows inside it.
+    # Padded past the radius so nothing that rounds to <= radius_miles is dropped.
+    dlat_deg = (radius_miles + 0.1) / 69.0
+    in_box = np.abs(lats - origin_lat) <= dlat_deg
+    edge_lat = min(abs(origin_lat) + dlat_deg, 89.0)
+    in_box &= np.abs(lons - origin_lon) <= dlat_deg / math.cos(math.radians(edge_lat))
+    candidates = np.flatnonzero(in_box)
+
+    dists = np.round(haversine_miles_np(origin_lat, origin_lon, lats[candidates], lons[candidates]), 1)
+    keep = dists <= radius_miles
+    candidates, dists = candidates[keep], dists[keep]
+    order = np.argsort(dists, kind="stable")
+    return _with_distances(located, candidates[order], dists[order])
@@ -145,7 +145,7 @@ if custom_location and custom_origin_lat is not None:
     if _required_tier_keys:
         filtered = [b for b in filtered if all(tier_has_data(b, tk) for tk in _required_tier_keys)]
     if _required_grades:
-        filtered = [b for b in filtered if assign_confidence_grade(b)["grade"] in _required_grades]
+        filtered = [b for b in filtered if b["confidence_grade"] in _required_grades]
 
     # Apply custom radius filter
     filtered = filter_by_custom_radius(custom_origin_lat, custom_origin_lon, filtered, custom_radius)
@@ -201,7 +201,7 @@ else:
     if _required_grades:
         results["businesses"] = [
             b for b in results["businesses"]
-            if assign_confidence_grade(b)["grade"] in _required_grades
+            if b["confidence_grade"] in _required_grades
         ]
         results["total"] = len(results["businesses"])
     # Re-sort by confidence in Python if selected
@@ -210,7 +210,7 @@ else:
 
     yelp_batch_size = st.slider("Batch size", min_value=10, max_value=200, value=50, step=10,
                                 key="yelp_batch_size",
-                                help="Number of businesses to look up per run")
+                                help="Number of businesses to enrich per run (searches up to 4x as many)")
 
     if st.button("Fetch Yelp Ratings", key="yelp_fetch", type="primary"):
         progress_bar = st.progress(0)
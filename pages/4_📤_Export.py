@@ -1,5 +1,6 @@
 import streamlit as st
 import pandas as pd
+import io
 from database import export_search_to_csv, create_tables
 from branding import inject_branding, sidebar_brand, tier_summary
 
@@ -12,9 +13,14 @@ with st.sidebar:
 
 st.title("📤 Export Data")
 
-st.markdown("Download all businesses as a CSV file with data source tier info.")
+st.markdown("Download all businesses as a CSV or Parquet file with data source tier info.")
 
-if st.button("Generate CSV"):
+export_format = st.radio(
+    "Format", ["CSV", "Parquet"], horizontal=True,
+    help="Parquet is smaller and much faster to load in pandas or other analytics tools",
+)
+
+if st.button(f"Generate {export_format}"):
     rows = export_search_to_csv()
     for row in rows:
         row["data_sources"] = tier_summary(row)
@@ -30,11 +36,21 @@ if st.button("Generate CSV"):
             "distance_miles", "source", "data_sources", "notes",
         ] if c in df.columns
     ]
-    csv_data = df[export_cols].to_csv(index=False)
-
-    st.download_button(
-        label=f"Download CSV ({len(rows)} businesses)",
-        data=csv_data,
-        file_name="veteran_businesses_export.csv",
-        mime="text/csv",
-    )
+    if export_format == "Parquet":
+        buf = io.BytesIO()
+        df[export_cols].to_parquet(buf, index=False, compression="zstd")
+        st.download_button(
+            label=f"Download Parquet ({len(rows)} businesses)",
+            data=buf.getvalue(),
+            file_name="veteran_businesses_export.parquet",
+            mime="application/vnd.apache.parquet",
+        )
+    else:
+        csv_data = df[export_cols].to_csv(index=False)
+
+        st.download_button(
+            label=f"Download CSV ({len(rows)} businesses)",
+            data=csv_data,
+            file_name="veteran_businesses_export.csv",
+            mime="text/csv",
+        )
@@ -1,6 +1,9 @@
 import streamlit as st
-import pandas as pd
+import csv
+import html
 import io
+import json
+from datetime import datetime
 from database import get_businesses_by_ids, create_tables
 from geo import compute_distances_from_point
 from branding import inject_branding, sidebar_brand, BRAND_BLUE
@@ -64,11 +67,13 @@ display_headers = [
     distance_col_label, "Registration Status", "Source",
 ]
 
-df = pd.DataFrame(businesses)[report_columns]
-df.columns = display_headers
+# Plain row lists are enough for CSV and print; pandas is only needed for the table view
+report_rows = [[biz.get(c) for c in report_columns] for biz in businesses]
 
 csv_buffer = io.StringIO()
-df.to_csv(csv_buffer, index=False)
+csv_writer = csv.writer(csv_buffer)
+csv_writer.writerow(display_headers)
+csv_writer.writerows(report_rows)
 
 action_cols[1].download_button(
     label="Export CSV",
@@ -81,8 +86,8 @@ action_cols[1].download_button(
 if action_cols[2].button("Print Report"):
     # Build print-friendly HTML
     rows_html = ""
-    for _, row in df.iterrows():
-        cells = "".join(f"<td style='padding:6px 8px;border:1px solid #dee2e6;font-size:12px;'>{v if pd.notna(v) else ''}</td>" for v in row)
+    for row in report_rows:
+        cells = "".join(f"<td style='padding:6px 8px;border:1px solid #dee2e6;font-size:12px;'>{v if v is not None else ''}</td>" for v in row)
         rows_html += f"<tr>{cells}</tr>"
     headers_html = "".join(f"<th style='padding:6px 8px;border:1px solid #dee2e6;background:#2ea3f2;color:white;font-size:12px;'>{h}</th>" for h in display_headers)
 
@@ -90,17 +95,19 @@ if action_cols[2].button("Print Report"):
     <html><head><title>Veteran Business Report</title></head>
     <body style="font-family:Arial,sans-serif;">
     <h2>Veteran Business Report - Active Heroes</h2>
-    <p>{len(businesses)} businesses &bull; Generated {pd.Timestamp.now().strftime('%B %d, %Y')}</p>
+    <p>{len(businesses)} businesses &bull; Generated {datetime.now().strftime('%B %d, %Y')}</p>
     <table style="border-collapse:collapse;width:100%;">
     <thead><tr>{headers_html}</tr></thead>
     <tbody>{rows_html}</tbody>
     </table></body></html>
     """
-    # Open print dialog via JS
+    # Open print dialog via JS (JSON-encode so quotes/backticks survive; escape
+    # "</" so a closing tag in the data can't end the <script> block early)
+    js_html = json.dumps(print_html).replace("</", "<\\/")
     st.components.v1.html(
         f"""<script>
         var w = window.open('', '_blank');
-        w.document.write(`{print_html.replace(chr(96), "'")}`);
+        w.document.write({js_html});
         w.document.close();
         w.print();
         </script>""",
@@ -114,47 +121,63 @@ if action_cols[3].button("Clear All"):
 
 st.divider()
 
-# Full-detail table
-for biz in businesses:
+# Remove businesses via one multiselect instead of a button per card
+biz_names = {biz["id"]: biz["legal_business_name"] for biz in businesses}
+rm_col1, rm_col2 = st.columns([4, 1])
+to_remove = rm_col1.multiselect(
+    "Remove from report",
+    options=list(biz_names),
+    format_func=biz_names.get,
+    key="report_remove",
+)
+if rm_col2.button("Remove", disabled=not to_remove):
+    st.session_state.selected_businesses.difference_update(to_remove)
+    st.session_state.pop("report_remove", None)
+    st.rerun()
+
+
+def _detail_card_html(biz):
+    """One bordered card with name, type, distance, address, contact and registration info."""
+    def esc(value):
+        return html.escape(str(value)) if value not in (None, "") else "N/A"
+
     bt = biz.get("business_type") or ""
     is_sdvosb = "Service Disabled" in bt
     border_color = BRAND_BLUE if is_sdvosb else "#27ae60" if bt else "#dee2e6"
+    type_label = (
+        '<span style="color:#2C5282;font-weight:700;">SDVOSB</span>' if is_sdvosb
+        else '<span style="color:#2F855A;font-weight:700;">VOB</span>' if bt else ""
+    )
+    dba = f" (DBA: {html.escape(biz['dba_name'])})" if biz.get("dba_name") else ""
+    dist = biz.get(distance_key)
+    dist_text = f" — {dist} mi" if dist is not None else ""
+    city_state_zip = html.escape(f"{biz.get('city', '')}, {biz.get('state', '')} {biz.get('zip_code', '')}")
+
+    return (
+        f'<div style="border:1px solid #dee2e6;border-top:3px solid {border_color};'
+        f'border-radius:0.5rem;padding:0.75rem 1rem;margin-bottom:0.75rem;">'
+        f'<h3 style="margin:0 0 0.5rem 0;">{html.escape(biz["legal_business_name"])}{dba} {type_label}{dist_text}</h3>'
+        f'<div style="display:grid;grid-template-columns:repeat(3,1fr);gap:0.5rem;">'
+        f'<div><b>Address:</b> {esc(biz.get("physical_address_line1"))}<br>{city_state_zip}</div>'
+        f'<div><b>Phone:</b> {esc(biz.get("phone"))}<br>'
+        f'<b>Email:</b> {esc(biz.get("email"))}<br>'
+        f'<b>Website:</b> {esc(biz.get("website"))}</div>'
+        f'<div><b>Owner:</b> {esc(biz.get("owner_name"))}<br>'
+        f'<b>Branch:</b> {esc(biz.get("service_branch"))}<br>'
+        f'<b>NAICS:</b> {esc(biz.get("naics_codes"))}<br>'
+        f'<b>Source:</b> {esc(biz.get("source"))}</div>'
+        f'</div></div>'
+    )
+
 
-    with st.container(border=True):
-        st.markdown(
-            f'<div style="border-top: 3px solid {border_color}; margin: -1rem -1rem 0.75rem -1rem;"></div>',
-            unsafe_allow_html=True,
-        )
-
-        top_cols = st.columns([4, 1])
-        name = biz["legal_business_name"]
-        dba = f" (DBA: {biz['dba_name']})" if biz.get("dba_name") else ""
-        type_label = ":blue[**SDVOSB**]" if is_sdvosb else ":green[**VOB**]" if bt else ""
-        dist = biz.get(distance_key)
-        dist_text = f" — {dist} mi" if dist is not None else ""
-
-        top_cols[0].markdown(f"### {name}{dba} {type_label}{dist_text}")
-
-        if top_cols[1].button("Remove", key=f"rm_{biz['id']}"):
-            st.session_state.selected_businesses.discard(biz["id"])
-            st.rerun()
-
-        # Detail grid
-        c1, c2, c3 = st.columns(3)
-        address = biz.get("physical_address_line1", "")
-        city_state_zip = f"{biz.get('city', '')}, {biz.get('state', '')} {biz.get('zip_code', '')}"
-        c1.markdown(f"**Address:** {address}")
-        c1.markdown(f"{city_state_zip}")
-
-        c2.markdown(f"**Phone:** {biz.get('phone') or 'N/A'}")
-        c2.markdown(f"**Email:** {biz.get('email') or 'N/A'}")
-        c2.markdown(f"**Website:** {biz.get('website') or 'N/A'}")
-
-        c3.markdown(f"**Owner:** {biz.get('owner_name') or 'N/A'}")
-        c3.markdown(f"**Branch:** {biz.get('service_branch') or 'N/A'}")
-        c3.markdown(f"**NAICS:** {biz.get('naics_codes') or 'N/A'}")
-        c3.markdown(f"**Source:** {biz.get('source') or 'N/A'}")
+# Full-detail cards, rendered as a single markdown element
+st.markdown("".join(_detail_card_html(biz) for biz in businesses), unsafe_allow_html=True)
 
 # Also show as a data table for quick scanning
 with st.expander("View as table"):
+    import pandas as pd
+    df = pd.DataFrame(report_rows, columns=display_headers)
+    # Low-cardinality text columns are much smaller as categoricals
+    for col in ("Type", "Branch", "State", "Registration Status", "Source"):
+        df[col] = df[col].astype("category")
     st.dataframe(df, use_container_width=True, hide_index=True)
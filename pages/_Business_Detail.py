@@ -8,6 +8,10 @@ from branding import (
     render_confidence_breakdown, GRADE_INFO, yelp_stars_html,
 )
 
+_BUSINESS_TYPES = ("", "Veteran Owned Small Business", "Service Disabled Veteran Owned Small Business")
+_BRANCHES = ("", "Army", "Navy", "Air Force", "Marine Corps", "Coast Guard", "Space Force", "National Guard")
+_BRANCH_INDEX = {b: i for i, b in enumerate(_BRANCHES)}
+
 st.set_page_config(page_title="Business Detail | Veteran Business Directory", page_icon="🎖️", layout="wide")
 create_tables()
 inject_branding()
@@ -139,7 +143,7 @@ if is_logged_in:
             ed3, ed4 = st.columns(2)
             biz_type = ed3.selectbox(
                 "Business Type",
-                ["", "Veteran Owned Small Business", "Service Disabled Veteran Owned Small Business"],
+                _BUSINESS_TYPES,
                 index=(
                     2 if biz.get("business_type") and "Service Disabled" in biz["business_type"]
                     else 1 if biz.get("business_type") else 0
@@ -147,13 +151,8 @@ if is_logged_in:
             )
             branch = ed4.selectbox(
                 "Service Branch",
-                ["", "Army", "Navy", "Air Force", "Marine Corps", "Coast Guard", "Space Force", "National Guard"],
-                index=(
-                    ["", "Army", "Navy", "Air Force", "Marine Corps", "Coast Guard", "Space Force", "National Guard"]
-                    .index(biz["service_branch"]) if biz.get("service_branch") in
-                    ["Army", "Navy", "Air Force", "Marine Corps", "Coast Guard", "Space Force", "National Guard"]
-                    else 0
-                ),
+                _BRANCHES,
+                index=_BRANCH_INDEX.get(biz.get("service_branch") or "", 0),
             )
 
             st.markdown("**Address**")
@@ -5,7 +5,19 @@ Supports nationwide pull, resume, and progress callbacks.
 """
 
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # optional speedup; stdlib json is fine
+    import json
+    _json_loads = json.loads
 
 from config import (
     SAM_GOV_API_KEY, SAM_GOV_BASE_URL, VETERAN_BUSINESS_TYPES,
@@ -13,10 +25,25 @@ from config import (
 )
 from geo import geocode_business
 from database import (
-    upsert_business_cross_source, start_fetch_log, complete_fetch_log,
+    upsert_businesses_cross_source, start_fetch_log, complete_fetch_log,
     get_last_fetch,
 )
 
+# Shared null object for absent (or null) nested sections in SAM.gov entities
+_EMPTY = {}
+
+# Max concurrent page requests per state/type combo
+MAX_IN_FLIGHT = 4
+
+# Shared session so page requests reuse pooled keep-alive connections.
+# Transient 5xx errors are retried here; 429s are handled in the fetch loop.
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(
+    pool_maxsize=MAX_IN_FLIGHT,
+    max_retries=Retry(total=3, backoff_factor=1, status_forcelist=[502, 503, 504],
+                      raise_on_status=False),
+))
+
 
 def fetch_veteran_businesses(states=None, callback=None, resume=False):
     """Fetch veteran-owned businesses from SAM.gov.
@@ -49,12 +76,14 @@ def fetch_veteran_businesses(states=None, callback=None, resume=False):
 
     total_combos = len(states) * len(VETERAN_BUSINESS_TYPES)
     done_combos = 0
+    succeeded = []  # combo keys that are done, recorded for resume
 
     try:
         for state in states:
             for biz_type in VETERAN_BUSINESS_TYPES:
                 combo_key = f"{state}:{biz_type}"
                 if resume and combo_key in completed_today:
+                    succeeded.append(combo_key)
                     done_combos += 1
                     continue
 
@@ -65,6 +94,7 @@ def fetch_veteran_businesses(states=None, callback=None, resume=False):
                     result["total_fetched"] += fetched
                     result["new"] += new
                     result["updated"] += updated
+                    succeeded.append(combo_key)
                 except Exception as e:
                     if callback:
                         callback(f"Error fetching {state}/{biz_type}: {e}", None)
@@ -74,9 +104,7 @@ def fetch_veteran_businesses(states=None, callback=None, resume=False):
 
             result["states_completed"].append(state)
 
-        completed_details = ",".join(
-            f"{s}:{t}" for s in result["states_completed"] for t in VETERAN_BUSINESS_TYPES
-        )
+        completed_details = ",".join(succeeded)
         complete_fetch_log(
             log_id, status="completed",
             records_fetched=result["total_fetched"],
@@ -105,61 +133,70 @@ def _fetch_by_state_and_type(state, biz_type, callback, done_combos, total_combo
     fetched = 0
     new = 0
     updated = 0
-    page = 0
     total_pages = 1
+    last_request = 0.0
+    base_params = {
+        "api_key": SAM_GOV_API_KEY,
+        "physicalAddressProvinceOrStateCode": state,
+        "sbaBusinessTypeDesc": biz_type,
+        "registrationStatus": "A",
+        # Only the sections _parse_entity reads; skips pointsOfContact etc.
+        "includeSections": "entityRegistration,coreData,assertions",
+        "size": 10,
+    }
+
+    def submit(pool, page_num):
+        # Keep the 0.5s politeness gap between requests, not between pages parsed
+        nonlocal last_request
+        wait = 0.5 - (time.monotonic() - last_request)
+        if wait > 0:
+            time.sleep(wait)
+        last_request = time.monotonic()
+        return page_num, pool.submit(_fetch_page, base_params, biz_type, page_num)
+
+    # Up to MAX_IN_FLIGHT pages are requested, parsed and geocoded on the pool
+    # while earlier pages are saved on this thread
+    with ThreadPoolExecutor(max_workers=MAX_IN_FLIGHT) as pool:
+        pending = deque([submit(pool, 0)])
+        next_page = 1
+
+        while pending:
+            page, future = pending.popleft()
+            try:
+                total_records, entity_count, businesses = future.result()
+            except requests.exceptions.HTTPError as e:
+                if e.response is not None and e.response.status_code == 429:
+                    msg = f"Rate limited on {state}, waiting 60s..."
+                    if callback:
+                        callback(msg, None)
+                    else:
+                        print(f"  {msg}")
+                    time.sleep(60)
+                    pending.appendleft(submit(pool, page))
+                    continue
+                break
+            except Exception as e:
+                if not callback:
+                    print(f"  Request error: {e}")
+                break
 
-    while page < total_pages:
-        params = {
-            "api_key": SAM_GOV_API_KEY,
-            "physicalAddressProvinceOrStateCode": state,
-            "sbaBusinessTypeDesc": biz_type,
-            "registrationStatus": "A",
-            "page": page,
-            "size": 10,
-        }
+            if page == 0:
+                total_pages = min((total_records // 10) + 1, 1000)
 
-        try:
-            resp = requests.get(SAM_GOV_BASE_URL, params=params, timeout=30)
-            resp.raise_for_status()
-            data = resp.json()
-        except requests.exceptions.HTTPError:
-            if resp.status_code == 429:
-                msg = f"Rate limited on {state}, waiting 60s..."
-                if callback:
-                    callback(msg, None)
-                else:
-                    print(f"  {msg}")
-                time.sleep(60)
-                continue
-            break
-        except Exception as e:
-            if not callback:
-                print(f"  Request error: {e}")
-            break
-
-        total_records = data.get("totalRecords", 0)
-        if page == 0:
-            total_pages = min((total_records // 10) + 1, 1000)
-
-        entities = data.get("entityData", [])
-        if not entities:
-            break
-
-        for entity in entities:
-            business = _parse_entity(entity, biz_type)
-            if business is None:
-                continue
+            if not entity_count:
+                break
+
+            while next_page < total_pages and len(pending) < MAX_IN_FLIGHT:
+                pending.append(submit(pool, next_page))
+                next_page += 1
 
-            geocode_business(business)
-            status = upsert_business_cross_source(business)
-            fetched += 1
-            if status == "new":
-                new += 1
-            elif status == "updated":
-                updated += 1
+            statuses = upsert_businesses_cross_source(businesses)
+            fetched += len(statuses)
+            new += statuses.count("new")
+            updated += statuses.count("updated")
 
-        page += 1
-        time.sleep(0.5)
+        for _, future in pending:
+            future.cancel()
 
     if not callback:
         print(f"  Fetched: {fetched}, New: {new}, Updated: {updated}")
@@ -167,47 +204,70 @@ def _fetch_by_state_and_type(state, biz_type, callback, done_combos, total_combo
     return fetched, new, updated
 
 
+def _fetch_page(base_params, biz_type, page):
+    """Request one page, then parse and geocode its entities.
+
+    Runs on the fetch pool. Returns (total_records, entity_count, businesses).
+    """
+    resp = _get_page(base_params, page)
+    resp.raise_for_status()
+    data = _json_loads(resp.content)
+
+    entities = data.get("entityData") or []
+    businesses = []
+    for entity in entities:
+        try:
+            business = _parse_entity(entity, biz_type)
+        except (AttributeError, TypeError) as e:  # malformed entity
+            print(f"  Parse error: {e}")
+            continue
+        if business is not None:
+            businesses.append(geocode_business(business))
+    return data.get("totalRecords", 0), len(entities), businesses
+
+
+def _get_page(base_params, page):
+    """Request one page of a state/type combo's query."""
+    # Copy rather than mutate: several pages of the same combo are in flight at once
+    return _session.get(SAM_GOV_BASE_URL, params={**base_params, "page": page}, timeout=30)
+
+
 def _parse_entity(entity: dict, biz_type: str):
-    try:
-        reg = entity.get("entityRegistration", {})
-        core = entity.get("coreData", {})
-        entity_info = core.get("entityInformation", {})
-        phys_addr = core.get("physicalAddress", {})
-
-        assertions = entity.get("assertions", {})
-        goods = assertions.get("goodsAndServices", {})
-        naics_list = goods.get("naicsList", []) if goods else []
-        naics_codes = []
-        naics_descs = []
-        for n in naics_list:
-            naics_entry = n.get("naicsCode", "")
-            if naics_entry:
-                naics_codes.append(str(naics_entry))
-                desc = n.get("naicsDescription", "")
-                if desc:
-                    naics_descs.append(desc)
-
-        return {
-            "uei": reg.get("ueiSAM", ""),
-            "cage_code": reg.get("cageCode", ""),
-            "legal_business_name": reg.get("legalBusinessName", ""),
-            "dba_name": reg.get("dbaName", ""),
-            "physical_address_line1": phys_addr.get("addressLine1", ""),
-            "physical_address_line2": phys_addr.get("addressLine2", ""),
-            "city": phys_addr.get("city", ""),
-            "state": phys_addr.get("stateOrProvinceCode", ""),
-            "zip_code": phys_addr.get("zipCode", ""),
-            "phone": "",
-            "email": "",
-            "website": "",
-            "business_type": biz_type,
-            "naics_codes": ", ".join(naics_codes),
-            "naics_descriptions": ", ".join(naics_descs),
-            "registration_status": reg.get("registrationStatus", ""),
-            "registration_expiration": reg.get("registrationExpirationDate", ""),
-            "entity_start_date": entity_info.get("entityStartDate", ""),
-            "source": SOURCE_SAM_GOV,
-        }
-    except Exception as e:
-        print(f"  Parse error: {e}")
-        return None
+    """Map a SAM.gov entity to a business dict, or None if it has no legal name.
+
+    SAM.gov sends null for absent sections, so every nested lookup falls back
+    to an empty mapping rather than relying on the key being missing.
+    """
+    reg = entity.get("entityRegistration") or _EMPTY
+    legal_name = reg.get("legalBusinessName", "")
+    if not legal_name:
+        return None  # nothing to store or match on; skip the nested parsing
+
+    core = entity.get("coreData") or _EMPTY
+    entity_info = core.get("entityInformation") or _EMPTY
+    phys_addr = core.get("physicalAddress") or _EMPTY
+
+    goods = (entity.get("assertions") or _EMPTY).get("goodsAndServices") or _EMPTY
+    naics_pairs = [
+        (str(n["naicsCode"]), n.get("naicsDescription"))
+        for n in goods.get("naicsList") or () if n.get("naicsCode")
+    ]
+
+    return {
+        "uei": reg.get("ueiSAM", ""),
+        "cage_code": reg.get("cageCode", ""),
+        "legal_business_name": legal_name,
+        "dba_name": reg.get("dbaName", ""),
+        "physical_address_line1": phys_addr.get("addressLine1", ""),
+        "physical_address_line2": phys_addr.get("addressLine2", ""),
+        "city": phys_addr.get("city", ""),
+        "state": phys_addr.get("stateOrProvinceCode", ""),
+        "zip_code": phys_addr.get("zipCode", ""),
+        "business_type": biz_type,
+        "naics_codes": ", ".join(code for code, _ in naics_pairs),
+        "naics_descriptions": ", ".join(desc for _, desc in naics_pairs if desc),
+        "registration_status": reg.get("registrationStatus", ""),
+        "registration_expiration": reg.get("registrationExpirationDate", ""),
+        "entity_start_date": entity_info.get("entityStartDate", ""),
+        "source": SOURCE_SAM_GOV,
+    }
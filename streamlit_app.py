@@ -2,6 +2,7 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import folium
+from folium.plugins import MarkerCluster
 from streamlit_folium import st_folium
 from database import (
     create_tables, get_stats, get_contact_stats, get_map_data,
@@ -12,9 +13,9 @@ from geo import zip_to_coords, filter_by_custom_radius
 from config import ACTIVE_HEROES_LAT, ACTIVE_HEROES_LON
 from branding import (
     inject_branding, sidebar_brand, render_tier_legend_html, BRAND_BLUE, NAVY,
-    TRUST_TIERS, tier_has_data, confidence_badge_html,
+    TRUST_TIERS, confidence_badge_html,
     render_dashboard_tier_card, compute_confidence_score, CONFIDENCE_GRADES,
-    assign_confidence_grade, grade_badge_html, metric_card, style_chart,
+    grade_badge_html, metric_card, style_chart,
     GRADE_CRITERIA, GRADE_INFO, GRADE_OPTIONS, CHART_COLORS,
 )
 
@@ -28,6 +29,207 @@ inject_branding()
 
 create_tables()
 
+# Map marker (color, label) per certification type
+_SDVOSB_STYLE = ("#2C5282", "SDVOSB")
+_VOB_STYLE = ("#2F855A", "VOB")
+
+# (tier_key, weight) pairs for the aggregate data-completeness score
+_TIER_WEIGHTS = tuple((k, info["weight"]) for k, info in TRUST_TIERS.items())
+_TIER_WEIGHT_TOTAL = sum(w for _, w in _TIER_WEIGHTS)
+
+# Fixed-marker popups
+_HQ_POPUP_HTML = (
+    "<div style='font-family: Inter, sans-serif;'>"
+    "<b style='font-size: 14px;'>Active Heroes HQ</b><br>"
+    "<span style='color: #5a6c7d;'>Shepherdsville, KY</span>"
+    "</div>"
+)
+_SEARCH_POPUP_TMPL = (
+    "<div style='font-family: Inter, sans-serif;'>"
+    "<b style='font-size: 14px;'>Search Location</b><br>"
+    "<span style='color: #5a6c7d;'>Zip: {zip}</span>"
+    "</div>"
+)
+
+# Business marker popup; optional *_html blocks are "" when the field is empty
+_POPUP_TMPL = (
+    "<div style='font-family: Inter, sans-serif; line-height: 1.5;'><br>"
+    "<b style='font-size: 14px;'>{name}</b><br>"
+    "{dba_html}"
+    "<span style='color: #5a6c7d;'>{city_state}</span><br>"
+    "<span style='background: {color}; color: white; padding: 2px 8px; border-radius: 4px; font-size: 12px;'>{type_label}</span>"
+    " {grade_html}"
+    "{dist_html}{phone_html}{email_html}{website_html}"
+    "<br><br><b style='color: #3182CE; cursor: pointer;'>Click marker again to view full details →</b><br>"
+    "</div>"
+)
+
+
+@st.cache_data
+def _count_chart(items, columns, title, height, kind="bar"):
+    """Styled bar/pie figure (as a dict) for a tuple of (label, count) pairs, cached across reruns."""
+    label_col, count_col = columns
+    df = pd.DataFrame.from_records(items, columns=[label_col, count_col])
+    if kind == "pie":
+        fig = px.pie(df, names=label_col, values=count_col, title=title)
+    else:
+        fig = px.bar(df, x=label_col, y=count_col, title=title)
+    return style_chart(fig, height=height).to_dict()
+
+
+@st.cache_data
+def _grade_chart(grade_counts):
+    """Styled grade-distribution bar figure (as a dict) for a tuple of (grade, count) pairs."""
+    grade_df = pd.DataFrame.from_records(
+        [(f"{g} - {GRADE_INFO[g]['label']}", cnt) for g, cnt in grade_counts],
+        columns=["Grade", "Count"],
+    )
+    grade_df["Grade"] = pd.Categorical(grade_df["Grade"], categories=grade_df["Grade"], ordered=True)
+    fig_grade = px.bar(
+        grade_df, x="Grade", y="Count",
+        color="Grade",
+        color_discrete_map={
+            f"{g} - {GRADE_INFO[g]['label']}": GRADE_INFO[g]["color"]
+            for g in ("A", "B", "C", "D", "F")
+        },
+        title="Businesses by Data Completeness Grade",
+    )
+    fig_grade.update_layout(showlegend=False)
+    return style_chart(fig_grade, height=300).to_dict()
+
+
+@st.cache_data
+def _contact_chart(total, has_phone, has_email, has_website):
+    """Styled stacked contact-coverage bar figure (as a dict)."""
+    contact_df = pd.DataFrame([
+        {"Field": "Phone", "Has Data": has_phone, "Missing": total - has_phone},
+        {"Field": "Email", "Has Data": has_email, "Missing": total - has_email},
+        {"Field": "Website", "Has Data": has_website, "Missing": total - has_website},
+    ])
+    fig_contact = px.bar(
+        contact_df, x="Field", y=["Has Data", "Missing"],
+        title="Contact Data Coverage",
+        barmode="stack",
+        color_discrete_map={"Has Data": "#2F855A", "Missing": "#E2E8F0"},
+    )
+    return style_chart(fig_contact, height=350).to_dict()
+
+
+def _click_key(lat, lng):
+    """Pack a coordinate, quantized to 5 decimals, into one int for click lookups."""
+    return (round(lat * 1e5) << 32) | (round(lng * 1e5) & 0xFFFFFFFF)
+
+
+@st.cache_resource(max_entries=8)
+def _build_business_map(data, center_lat, center_lon, custom_zip, distance_key, distance_from_label):
+    """Folium map plus a _click_key -> [indices into data] lookup, reused across reruns with the same inputs."""
+    m = folium.Map(
+        location=[center_lat, center_lon],
+        zoom_start=8,
+        tiles="CartoDB positron",
+    )
+
+    # Custom location marker (when searching from a different location)
+    if custom_zip:
+        folium.Marker(
+            location=[center_lat, center_lon],
+            popup=folium.Popup(_SEARCH_POPUP_TMPL.format(zip=custom_zip), max_width=250),
+            icon=folium.Icon(color="blue", icon="home", prefix="fa"),
+        ).add_to(m)
+
+    # Active Heroes HQ marker
+    folium.Marker(
+        location=[ACTIVE_HEROES_LAT, ACTIVE_HEROES_LON],
+        popup=folium.Popup(_HQ_POPUP_HTML, max_width=250),
+        icon=folium.Icon(color="darkred", icon="star", prefix="fa"),
+    ).add_to(m)
+
+    # Business markers — one clustered layer (individual markers from zoom 11); build coordinate lookup for click handling
+    business_layer = MarkerCluster(name="Businesses", disableClusteringAtZoom=11)
+    # Geocoding is per zip, so co-located businesses share a key; keep all of them
+    coord_to_idx = {}
+    for idx, b in enumerate(data):
+        coord_to_idx.setdefault(_click_key(b["latitude"], b["longitude"]), []).append(idx)
+    # Classify each distinct business_type once; markers then do a dict lookup
+    type_styles = {
+        t: _SDVOSB_STYLE if t and "Service Disabled" in t else _VOB_STYLE
+        for t in {b.get("business_type") for b in data}
+    }
+    for biz in data:
+        color, type_label = type_styles.get(biz.get("business_type"), _VOB_STYLE)
+
+        name = biz["legal_business_name"]
+        city_state = f"{biz.get('city', '')}, {biz.get('state', '')}"
+        dist = biz.get(distance_key)
+        lat, lng = biz["latitude"], biz["longitude"]
+
+        # Grade badge for popup (confidence_grade is computed by the database)
+        biz_grade = GRADE_INFO[biz["confidence_grade"]]
+        grade_html = (
+            f'<span style="background:{biz_grade["color"]}; color:white; '
+            f'padding:2px 8px; border-radius:8px; font-size:11px; font-weight:700;">'
+            f'{biz_grade["grade"]}</span>'
+        )
+
+        dba_html = f"<i style='color: #7a8a99;'>DBA: {biz['dba_name']}</i><br>" if biz.get("dba_name") else ""
+        dist_html = f"<br><span style='color: #7a8a99;'>{dist} mi from {distance_from_label}</span>" if dist is not None else ""
+        phone_html = f"<br>📞 {biz['phone']}" if biz.get("phone") else ""
+        email_html = f"<br>✉️ {biz['email']}" if biz.get("email") else ""
+        website = biz.get("website")
+        website_html = f'<br>🌐 <a href="{website}" target="_blank" style="color: #3182CE;">{website}</a>' if website else ""
+
+        popup_html = _POPUP_TMPL.format(
+            name=name, dba_html=dba_html, city_state=city_state, color=color, type_label=type_label,
+            grade_html=grade_html, dist_html=dist_html, phone_html=phone_html,
+            email_html=email_html, website_html=website_html,
+        )
+
+        folium.CircleMarker(
+            location=[lat, lng],
+            radius=7,
+            color=color,
+            fill=True,
+            fill_color=color,
+            fill_opacity=0.7,
+            popup=folium.Popup(popup_html, max_width=300),
+            tooltip=name,
+        ).add_to(business_layer)
+    business_layer.add_to(m)
+    return m, coord_to_idx
+
+
+@st.fragment
+def _map_action_panel(businesses):
+    """Actions for the clicked marker; selection changes rerun only this panel, not the map.
+
+    businesses holds every business at the clicked coordinates; when there
+    is more than one, a picker chooses which one the actions apply to.
+    """
+    with st.container(border=True):
+        if len(businesses) > 1:
+            biz = st.selectbox(
+                f"{len(businesses)} businesses at this location",
+                businesses,
+                format_func=lambda b: b["legal_business_name"],
+                key="map_pick",
+            )
+        else:
+            biz = businesses[0]
+        biz_id = biz["id"]
+        c1, c2, c3 = st.columns([3, 1, 1])
+        c1.markdown(f"**{biz['legal_business_name']}** — {biz.get('city', '')}, {biz.get('state', '')}")
+        if c2.button("View Details", key="map_detail"):
+            st.session_state.selected_business_id = biz_id
+            st.switch_page("pages/_Business_Detail.py")
+        if biz_id in st.session_state.selected_businesses:
+            if c3.button("Remove from Report", key="map_remove"):
+                st.session_state.selected_businesses.discard(biz_id)
+                st.rerun(scope="fragment")
+        else:
+            if c3.button("Add to Report", key="map_add"):
+                st.session_state.selected_businesses.add(biz_id)
+                st.rerun(scope="fragment")
+
 # --- Auth state ---
 if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
@@ -43,6 +245,9 @@ with st.sidebar:
 
     if st.session_state.logged_in:
         st.success("Logged in as Admin")
+        if st.button("Refresh Data", help="Re-query the database instead of using cached results"):
+            st.cache_data.clear()
+            st.rerun()
         if st.button("Logout"):
             st.session_state.logged_in = False
             st.rerun()
@@ -119,12 +324,10 @@ tier_stats = get_tier_completeness_stats()
 
 # Compute aggregate data quality grade from tier stats
 _agg_score = 0
-if tier_stats:
-    _weights = {k: TRUST_TIERS[k]["weight"] for k in TRUST_TIERS}
-    _total_w = sum(_weights.values())
+if tier_stats and _TIER_WEIGHT_TOTAL > 0:
     _agg_score = round(
-        sum(tier_stats[k]["pct"] * _weights[k] for k in tier_stats) / _total_w
-    ) if _total_w > 0 else 0
+        sum(tier_stats[k]["pct"] * w for k, w in _TIER_WEIGHTS if k in tier_stats) / _TIER_WEIGHT_TOTAL
+    )
 
 _agg_grade_info = CONFIDENCE_GRADES[-1]
 for _g in CONFIDENCE_GRADES:
@@ -157,15 +360,8 @@ if stats["total"] == 0:
     st.stop()
 
 # --- KPI Metric Cards ---
-vob_count = 0
-sdvosb_count = 0
-for t, c in stats.get("by_type", {}).items():
-    if not t:
-        continue
-    if "Service Disabled" in t:
-        sdvosb_count += c
-    else:
-        vob_count += c
+vob_count = stats["vob_count"]
+sdvosb_count = stats["sdvosb_count"]
 
 has_any_contact = 0
 contact_pct = 0
@@ -204,206 +400,98 @@ if tier_stats:
 # --- Grade Distribution Chart ---
 if total_biz > 0:
     st.subheader("Data Completeness Grade Distribution")
-    grade_df = pd.DataFrame([
-        {"Grade": f"{g} - {GRADE_INFO[g]['label']}", "Count": grade_dist.get(g, 0), "Color": GRADE_INFO[g]["color"]}
-        for g in ("A", "B", "C", "D", "F")
-    ])
-    fig_grade = px.bar(
-        grade_df, x="Grade", y="Count",
-        color="Grade",
-        color_discrete_map={
-            f"{g} - {GRADE_INFO[g]['label']}": GRADE_INFO[g]["color"]
-            for g in ("A", "B", "C", "D", "F")
-        },
-        title="Businesses by Data Completeness Grade",
-    )
-    fig_grade.update_layout(showlegend=False)
-    style_chart(fig_grade, height=300)
+    fig_grade = _grade_chart(tuple((g, grade_dist.get(g, 0)) for g in ("A", "B", "C", "D", "F")))
     st.plotly_chart(fig_grade, use_container_width=True)
 
-# --- Map Hero Section ---
-st.subheader("Business Locations")
-
-# Default HQ-based distance filter
-dist_filter = st.select_slider(
-    "Distance from HQ",
-    options=[25, 50, 75, 100],
-    value=100,
-    format_func=lambda x: f"{x} miles",
-)
 
-# Custom location toggle for map
-map_custom_location = st.toggle("Search from a different location", key="map_custom_location")
-
-map_center_lat = ACTIVE_HEROES_LAT
-map_center_lon = ACTIVE_HEROES_LON
-map_custom_zip = None
-distance_key = "distance_miles"
-distance_from_label = "HQ"
-using_custom = False
-
-if map_custom_location:
-    mc_col1, mc_col2 = st.columns([1, 2])
-    with mc_col1:
-        map_custom_zip = st.text_input("Zip Code", max_chars=5, placeholder="e.g. 40202", key="map_zip")
-    with mc_col2:
-        map_custom_radius = st.slider("Radius (miles)", min_value=10, max_value=250, value=50, step=5, key="map_radius")
-
-    if map_custom_zip and len(map_custom_zip) == 5 and map_custom_zip.isdigit():
-        clat, clon = zip_to_coords(map_custom_zip)
-        if clat is not None:
-            map_center_lat = clat
-            map_center_lon = clon
-            using_custom = True
-            distance_key = "custom_distance_miles"
-            distance_from_label = map_custom_zip
-        else:
-            st.warning(f"Could not find coordinates for zip code {map_custom_zip}.")
-    elif map_custom_zip:
-        st.warning("Please enter a valid 5-digit zip code.")
-
-# Fetch data based on mode
-if using_custom:
-    all_biz = get_all_businesses_with_coords()
-    data = filter_by_custom_radius(map_center_lat, map_center_lon, all_biz, map_custom_radius)
-else:
-    data = get_map_data(max_distance=dist_filter)
-
-# Apply tier filter
-if _required_tier_keys:
-    data = [b for b in data if all(tier_has_data(b, tk) for tk in _required_tier_keys)]
-
-# Apply grade filter
-if _required_grades:
-    data = [b for b in data if assign_confidence_grade(b)["grade"] in _required_grades]
-
-if data:
-    m = folium.Map(
-        location=[map_center_lat, map_center_lon],
-        zoom_start=8,
-        tiles="CartoDB positron",
+# --- Map Hero Section ---
+@st.fragment
+def _map_section(required_tier_keys, required_grades):
+    """Map, its location controls and the click action panel.
+
+    Runs as a fragment: moving the distance slider, changing the custom
+    location or clicking a marker reruns only this section, not the KPIs
+    and charts around it.
+    """
+    st.subheader("Business Locations")
+
+    # Default HQ-based distance filter
+    dist_filter = st.select_slider(
+        "Distance from HQ",
+        options=[25, 50, 75, 100],
+        value=100,
+        format_func=lambda x: f"{x} miles",
     )
 
-    # Custom location marker (when searching from a different location)
+    # Custom location toggle for map
+    map_custom_location = st.toggle("Search from a different location", key="map_custom_location")
+
+    map_center_lat = ACTIVE_HEROES_LAT
+    map_center_lon = ACTIVE_HEROES_LON
+    map_custom_zip = None
+    distance_key = "distance_miles"
+    distance_from_label = "HQ"
+    using_custom = False
+
+    if map_custom_location:
+        mc_col1, mc_col2 = st.columns([1, 2])
+        with mc_col1:
+            map_custom_zip = st.text_input("Zip Code", max_chars=5, placeholder="e.g. 40202", key="map_zip")
+        with mc_col2:
+            map_custom_radius = st.slider("Radius (miles)", min_value=10, max_value=250, value=50, step=5, key="map_radius")
+
+        if map_custom_zip and len(map_custom_zip) == 5 and map_custom_zip.isdigit():
+            clat, clon = zip_to_coords(map_custom_zip)
+            if clat is not None:
+                map_center_lat = clat
+                map_center_lon = clon
+                using_custom = True
+                distance_key = "custom_distance_miles"
+                distance_from_label = map_custom_zip
+            else:
+                st.warning(f"Could not find coordinates for zip code {map_custom_zip}.")
+        elif map_custom_zip:
+            st.warning("Please enter a valid 5-digit zip code.")
+
+    # Fetch data based on mode; tier and grade filters are applied in SQL
+    _quality_filters = {"tiers": tuple(required_tier_keys), "grades": tuple(required_grades)}
     if using_custom:
-        folium.Marker(
-            location=[map_center_lat, map_center_lon],
-            popup=folium.Popup(
-                f"<div style='font-family: Inter, sans-serif;'>"
-                f"<b style='font-size: 14px;'>Search Location</b><br>"
-                f"<span style='color: #5a6c7d;'>Zip: {map_custom_zip}</span>"
-                f"</div>",
-                max_width=250,
-            ),
-            icon=folium.Icon(color="blue", icon="home", prefix="fa"),
-        ).add_to(m)
-
-    # Active Heroes HQ marker
-    folium.Marker(
-        location=[ACTIVE_HEROES_LAT, ACTIVE_HEROES_LON],
-        popup=folium.Popup(
-            "<div style='font-family: Inter, sans-serif;'>"
-            "<b style='font-size: 14px;'>Active Heroes HQ</b><br>"
-            "<span style='color: #5a6c7d;'>Shepherdsville, KY</span>"
-            "</div>",
-            max_width=250,
-        ),
-        icon=folium.Icon(color="darkred", icon="star", prefix="fa"),
-    ).add_to(m)
-
-    # Business markers — build coordinate lookup for click handling
-    coord_to_id = {}
-    for biz in data:
-        bt = biz.get("business_type") or ""
-        is_sdvosb = "Service Disabled" in bt
-        color = "#2C5282" if is_sdvosb else "#2F855A"
-        type_label = "SDVOSB" if is_sdvosb else "VOB"
-
-        name = biz["legal_business_name"]
-        city_state = f"{biz.get('city', '')}, {biz.get('state', '')}"
-        dist = biz.get(distance_key)
-        lat, lng = biz["latitude"], biz["longitude"]
-
-        # Grade badge for popup
-        biz_grade = assign_confidence_grade(biz)
-        grade_html = (
-            f'<span style="background:{biz_grade["color"]}; color:white; '
-            f'padding:2px 8px; border-radius:8px; font-size:11px; font-weight:700;">'
-            f'{biz_grade["grade"]}</span>'
-        )
-
-        # Store mapping for click detection
-        coord_to_id[(round(lat, 5), round(lng, 5))] = biz["id"]
-
-        popup_lines = [
-            "<div style='font-family: Inter, sans-serif; line-height: 1.5;'>",
-            f"<b style='font-size: 14px;'>{name}</b>",
-        ]
-        if biz.get("dba_name"):
-            popup_lines.append(f"<i style='color: #7a8a99;'>DBA: {biz['dba_name']}</i>")
-        popup_lines.append(f"<span style='color: #5a6c7d;'>{city_state}</span>")
-        popup_lines.append(
-            f"<span style='background: {color}; color: white; padding: 2px 8px; border-radius: 4px; font-size: 12px;'>{type_label}</span>"
-            f" {grade_html}"
+        all_biz = get_all_businesses_with_coords(**_quality_filters)
+        data = filter_by_custom_radius(map_center_lat, map_center_lon, all_biz, map_custom_radius)
+    else:
+        data = get_map_data(max_distance=dist_filter, **_quality_filters)
+
+    if data:
+        m, coord_to_idx = _build_business_map(
+            data,
+            map_center_lat,
+            map_center_lon,
+            map_custom_zip if using_custom else None,
+            distance_key,
+            distance_from_label,
         )
-        if dist is not None:
-            popup_lines.append(f"<span style='color: #7a8a99;'>{dist} mi from {distance_from_label}</span>")
-        if biz.get("phone"):
-            popup_lines.append(f"📞 {biz['phone']}")
-        if biz.get("email"):
-            popup_lines.append(f"✉️ {biz['email']}")
-        if biz.get("website"):
-            popup_lines.append(f'🌐 <a href="{biz["website"]}" target="_blank" style="color: #3182CE;">{biz["website"]}</a>')
-        popup_lines.append("<br><b style='color: #3182CE; cursor: pointer;'>Click marker again to view full details →</b>")
-        popup_lines.append("</div>")
-
-        popup_html = "<br>".join(popup_lines)
 
-        folium.CircleMarker(
-            location=[lat, lng],
-            radius=7,
-            color=color,
-            fill=True,
-            fill_color=color,
-            fill_opacity=0.7,
-            popup=folium.Popup(popup_html, max_width=300),
-            tooltip=name,
-        ).add_to(m)
+        map_data = st_folium(m, use_container_width=True, height=500)
+
+        sel_count = len(st.session_state.selected_businesses)
+        caption = f"Showing {len(data)} businesses  |  🟢 VOB  |  🔵 SDVOSB  |  ⭐ Active Heroes HQ"
+        if using_custom:
+            caption += f"  |  🏠 Search from {map_custom_zip}"
+        if sel_count > 0:
+            caption += f"  |  **{sel_count} selected for report**"
+        st.caption(caption)
+
+        # Handle marker click — show action panel
+        if map_data and map_data.get("last_object_clicked"):
+            clicked = map_data["last_object_clicked"]
+            clicked_idxs = coord_to_idx.get(_click_key(clicked["lat"], clicked["lng"]))
+            if clicked_idxs:
+                _map_action_panel([data[i] for i in clicked_idxs])
+    else:
+        st.info("No businesses with coordinates to display on map.")
 
-    map_data = st_folium(m, use_container_width=True, height=500)
 
-    sel_count = len(st.session_state.selected_businesses)
-    caption = f"Showing {len(data)} businesses  |  🟢 VOB  |  🔵 SDVOSB  |  ⭐ Active Heroes HQ"
-    if using_custom:
-        caption += f"  |  🏠 Search from {map_custom_zip}"
-    if sel_count > 0:
-        caption += f"  |  **{sel_count} selected for report**"
-    st.caption(caption)
-
-    # Handle marker click — show action panel
-    if map_data and map_data.get("last_object_clicked"):
-        clicked = map_data["last_object_clicked"]
-        clicked_key = (round(clicked["lat"], 5), round(clicked["lng"], 5))
-        if clicked_key in coord_to_id:
-            clicked_id = coord_to_id[clicked_key]
-            clicked_biz = next((b for b in data if b["id"] == clicked_id), None)
-            if clicked_biz:
-                with st.container(border=True):
-                    c1, c2, c3 = st.columns([3, 1, 1])
-                    c1.markdown(f"**{clicked_biz['legal_business_name']}** — {clicked_biz.get('city', '')}, {clicked_biz.get('state', '')}")
-                    if c2.button("View Details", key="map_detail"):
-                        st.session_state.selected_business_id = clicked_id
-                        st.switch_page("pages/_Business_Detail.py")
-                    if clicked_id in st.session_state.selected_businesses:
-                        if c3.button("Remove from Report", key="map_remove"):
-                            st.session_state.selected_businesses.discard(clicked_id)
-                            st.rerun()
-                    else:
-                        if c3.button("Add to Report", key="map_add"):
-                            st.session_state.selected_businesses.add(clicked_id)
-                            st.rerun()
-else:
-    st.info("No businesses with coordinates to display on map.")
+_map_section(_required_tier_keys, _required_grades)
 
 st.divider()
 
@@ -413,33 +501,19 @@ col_left, col_right = st.columns(2)
 with col_left:
     st.subheader("By State")
     if stats.get("by_state"):
-        df_state = pd.DataFrame(
-            list(stats["by_state"].items()),
-            columns=["State", "Count"],
-        ).head(20)
-        fig_state = px.bar(
-            df_state, x="State", y="Count",
-            title="Top States by Business Count",
+        fig_state = _count_chart(
+            tuple(stats["by_state"].items())[:20], ("State", "Count"),
+            "Top States by Business Count", 350,
         )
-        style_chart(fig_state, height=350)
         st.plotly_chart(fig_state, use_container_width=True)
 
 with col_right:
     st.subheader("Contact Completeness")
     if contact_stats["total"] > 0:
-        t = contact_stats["total"]
-        contact_df = pd.DataFrame([
-            {"Field": "Phone", "Has Data": contact_stats["has_phone"], "Missing": t - contact_stats["has_phone"]},
-            {"Field": "Email", "Has Data": contact_stats["has_email"], "Missing": t - contact_stats["has_email"]},
-            {"Field": "Website", "Has Data": contact_stats["has_website"], "Missing": t - contact_stats["has_website"]},
-        ])
-        fig_contact = px.bar(
-            contact_df, x="Field", y=["Has Data", "Missing"],
-            title="Contact Data Coverage",
-            barmode="stack",
-            color_discrete_map={"Has Data": "#2F855A", "Missing": "#E2E8F0"},
+        fig_contact = _contact_chart(
+            contact_stats["total"], contact_stats["has_phone"],
+            contact_stats["has_email"], contact_stats["has_website"],
         )
-        style_chart(fig_contact, height=350)
         st.plotly_chart(fig_contact, use_container_width=True)
 
 # Distance and source
@@ -448,15 +522,10 @@ col_a, col_b = st.columns(2)
 with col_a:
     st.subheader("By Distance from HQ")
     if stats.get("by_distance"):
-        dist_df = pd.DataFrame(
-            list(stats["by_distance"].items()),
-            columns=["Bracket", "Count"],
+        fig_dist = _count_chart(
+            tuple(stats["by_distance"].items()), ("Bracket", "Count"),
+            "Business Distribution by Distance", 300,
         )
-        fig_dist = px.bar(
-            dist_df, x="Bracket", y="Count",
-            title="Business Distribution by Distance",
-        )
-        style_chart(fig_dist, height=300)
         st.plotly_chart(fig_dist, use_container_width=True)
     # Show count of businesses without distance data
     total_with_dist = sum(stats.get("by_distance", {}).values())
@@ -467,27 +536,18 @@ with col_a:
 with col_b:
     st.subheader("Data Sources")
     if stats.get("by_source"):
-        source_df = pd.DataFrame(
-            list(stats["by_source"].items()),
-            columns=["Source", "Count"],
-        )
-        fig_source = px.pie(
-            source_df, names="Source", values="Count",
-            title="Records by Data Source",
+        fig_source = _count_chart(
+            tuple(stats["by_source"].items()), ("Source", "Count"),
+            "Records by Data Source", 300, kind="pie",
         )
-        style_chart(fig_source, height=300)
         st.plotly_chart(fig_source, use_container_width=True)
 
     # Data freshness
     fetch_statuses = get_all_fetch_status()
     if fetch_statuses:
         st.caption("Last updated:")
-        from datetime import datetime
         for fs in fetch_statuses:
-            completed = fs.get("completed_at", "")
-            try:
-                dt = datetime.fromisoformat(completed)
-                days_ago = (datetime.now() - dt).days
-                st.caption(f"  {fs['source']}: {days_ago}d ago")
-            except (ValueError, TypeError):
+            if fs["days_ago"] is not None:
+                st.caption(f"  {fs['source']}: {fs['days_ago']}d ago")
+            else:
                 st.caption(f"  {fs['source']}: unknown")
@@ -5,13 +5,30 @@ No API key required — free, open data.
 """
 
 import time
-import requests
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+import requests
+import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:  # optional speedup; stdlib json is fine
+    import json
+    _json_loads = json.loads
+
+    def _json_dumps(obj):
+        return json.dumps(obj, separators=(",", ":")).encode()
+
 from config import USASPENDING_BASE_URL, SOURCE_USASPENDING
 from geo import geocode_business
 from database import (
-    upsert_business_cross_source, start_fetch_log, complete_fetch_log,
+    upsert_businesses_cross_source, start_fetch_log, complete_fetch_log,
 )
 
 # USAspending recipient type codes for veteran-owned businesses
@@ -29,9 +46,106 @@ _TYPE_MAP = {
     "service_disabled_veterans_small_business": "Service Disabled Veteran Owned Small Business",
 }
 
+# Award fields requested from spending_by_award
+_AWARD_FIELDS = [
+    "Recipient Name",
+    "Award Amount",
+    "Place of Performance State Code",
+    "Place of Performance Zip5",
+]
+
 # Max pages per recipient type to avoid infinite loops
 MAX_PAGES = 500
 
+# Max concurrent page requests per recipient type
+MAX_IN_FLIGHT = 4
+
+# Pages are sorted by award amount, so the tail is mostly repeat awards to
+# recipients already seen. Stop a recipient type once STAGNANT_PAGES pages
+# in a row each add fewer than MIN_YIELD_PER_PAGE new recipients.
+MIN_YIELD_PER_PAGE = 5
+STAGNANT_PAGES = 3
+
+# Shared session so page requests reuse pooled keep-alive connections.
+# spending_by_award is a read-only search, so POSTs are safe to retry on
+# transient 5xx errors; 429s are handled in the fetch loop.
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(
+    pool_maxsize=MAX_IN_FLIGHT,
+    max_retries=Retry(total=3, backoff_factor=1, status_forcelist=[502, 503, 504],
+                      allowed_methods=frozenset({"POST"}), raise_on_status=False),
+))
+
+# Recipients saved per transaction
+SAVE_BATCH_SIZE = 200
+
+# Minimum seconds between routine progress callbacks (each one redraws the UI)
+PROGRESS_INTERVAL = 0.1
+
+
+def _normalize_page(page_df, biz_type):
+    """Clean one page of raw awards into name/state/zip_code/amount columns.
+
+    Adds name_lower (the dedup key with state) and biz_type, and drops
+    awards with no recipient name.
+    """
+    df = page_df.reindex(columns=_AWARD_FIELDS)
+    out = pd.DataFrame({
+        "name": df["Recipient Name"].fillna("").astype(str).str.strip(),
+        "state": df["Place of Performance State Code"].fillna("").astype(str).str.strip(),
+        "zip_code": df["Place of Performance Zip5"].fillna("").astype(str).str.strip(),
+        "amount": pd.to_numeric(df["Award Amount"], errors="coerce").fillna(0.0),
+    })
+    out["name_lower"] = out["name"].str.lower()
+    out["biz_type"] = biz_type
+    return out[out["name"] != ""]
+
+
+def _aggregate_recipients(award_frames):
+    """Collapse normalized award pages into one row per (lowercased name, state).
+
+    Name, zip and business type come from the first award seen for each
+    recipient (pages are sorted by amount, so that is its largest award).
+    Returns a DataFrame with name, state, zip_code, biz_type, total_awards
+    and award_count columns.
+    """
+    if not award_frames:
+        return pd.DataFrame(columns=["name", "state", "zip_code", "biz_type", "total_awards", "award_count"])
+
+    df = pd.concat(award_frames, ignore_index=True)
+    return df.groupby(["name_lower", "state"], sort=False).agg(
+        name=("name", "first"),
+        zip_code=("zip_code", "first"),
+        biz_type=("biz_type", "first"),
+        total_awards=("amount", "sum"),
+        award_count=("amount", "size"),
+    ).reset_index()
+
+
+def _retry_after(resp, default):
+    """Seconds to wait from a 429's Retry-After header, or default if absent/unparseable."""
+    try:
+        return max(int(resp.headers.get("Retry-After", default)), 1)
+    except (TypeError, ValueError):
+        return default
+
+
+def _page_body_prefix(base_payload):
+    """Serialize the page-independent payload once, leaving the body open for the page number."""
+    return _json_dumps(base_payload)[:-1] + b',"page":'
+
+
+def _post_page(body_prefix, page):
+    """Request one spending_by_award page. Runs on the fetch pool."""
+    resp = _session.post(
+        f"{USASPENDING_BASE_URL}/search/spending_by_award/",
+        data=body_prefix + b"%d}" % page,
+        headers={"Content-Type": "application/json"},
+        timeout=60,
+    )
+    resp.raise_for_status()
+    return _json_loads(resp.content)
+
 
 def fetch_usaspending_veterans(callback=None):
     """Fetch veteran-owned businesses from USAspending.gov contract awards.
@@ -46,8 +160,19 @@ def fetch_usaspending_veterans(callback=None):
 
     result = {"total_fetched": 0, "new": 0, "updated": 0, "unique_recipients": 0}
 
-    # Deduplicate by (normalized_name, state) across pages
-    seen_recipients = {}  # key: (name_lower, state) -> aggregated award total
+    # Normalized award pages; deduplicated by (normalized_name, state) once all pages are in
+    award_frames = []
+    awards_seen = 0
+    last_progress = 0.0
+
+    def progress(msg, pct):
+        # Throttle routine page/save updates; errors and stage changes go
+        # straight to callback
+        nonlocal last_progress
+        now = time.monotonic()
+        if now - last_progress >= PROGRESS_INTERVAL:
+            last_progress = now
+            callback(msg, pct)
 
     try:
         five_years_ago = (datetime.now() - timedelta(days=5 * 365)).strftime("%Y-%m-%d")
@@ -60,130 +185,144 @@ def fetch_usaspending_veterans(callback=None):
             else:
                 print(f"\nFetching {type_label}...")
 
-            page = 1
-            has_next = True
-
-            while has_next and page <= MAX_PAGES:
-                payload = {
-                    "filters": {
-                        "recipient_type_names": [vet_type],
-                        "award_type_codes": CONTRACT_AWARD_TYPES,
-                        "time_period": [
-                            {"start_date": five_years_ago, "end_date": today}
-                        ],
-                    },
-                    "fields": [
-                        "Recipient Name",
-                        "Award Amount",
-                        "Place of Performance State Code",
-                        "Place of Performance Zip5",
+            base_payload = {
+                "filters": {
+                    "recipient_type_names": [vet_type],
+                    "award_type_codes": CONTRACT_AWARD_TYPES,
+                    "time_period": [
+                        {"start_date": five_years_ago, "end_date": today}
                     ],
-                    "page": page,
-                    "limit": 100,
-                    "sort": "Award Amount",
-                    "order": "desc",
-                }
+                },
+                "fields": _AWARD_FIELDS,
+                "limit": 100,
+                "sort": "Award Amount",
+                "order": "desc",
+            }
+            body_prefix = _page_body_prefix(base_payload)
+            last_request = 0.0
+            # Recipient keys seen for this type, for the low-yield cutoff
+            type_keys = set()
+            stagnant = 0
+
+            def submit(pool, page_num):
+                # Keep the 0.5s politeness gap between requests
+                nonlocal last_request
+                wait = 0.5 - (time.monotonic() - last_request)
+                if wait > 0:
+                    time.sleep(wait)
+                last_request = time.monotonic()
+                return page_num, pool.submit(_post_page, body_prefix, page_num)
+
+            # The total page count isn't reported, so keep the next MAX_IN_FLIGHT
+            # pages in flight and stop at the first empty / last page. Pages are
+            # consumed in order, so award_frames stays sorted by amount.
+            with ThreadPoolExecutor(max_workers=MAX_IN_FLIGHT) as pool:
+                pending = deque()
+                next_page = 1
+
+                while True:
+                    while next_page <= MAX_PAGES and len(pending) < MAX_IN_FLIGHT:
+                        pending.append(submit(pool, next_page))
+                        next_page += 1
+                    if not pending:
+                        break
+
+                    page, future = pending.popleft()
+                    try:
+                        data = future.result()
+                    except requests.exceptions.HTTPError as e:
+                        status_code = e.response.status_code if e.response is not None else None
+                        if status_code == 429:
+                            wait = _retry_after(e.response, default=30)
+                            msg = f"USAspending rate limited, waiting {wait}s..."
+                            if callback:
+                                callback(msg, None)
+                            else:
+                                print(f"  {msg}")
+                            time.sleep(wait)
+                            pending.appendleft(submit(pool, page))
+                            continue
+                        if callback:
+                            callback(f"API error: HTTP {status_code}", None)
+                        else:
+                            print(f"  API error: HTTP {status_code}")
+                        break
+                    except Exception as e:
+                        if callback:
+                            callback(f"Request error: {e}", None)
+                        else:
+                            print(f"  Request error: {e}")
+                        break
+
+                    awards = data.get("results", [])
+                    if not awards:
+                        break
+
+                    page_df = _normalize_page(
+                        pd.DataFrame(awards), _TYPE_MAP.get(vet_type, "Veteran Owned Small Business"))
+                    award_frames.append(page_df)
+                    awards_seen += len(awards)
+
+                    keys_before = len(type_keys)
+                    type_keys.update(zip(page_df["name_lower"], page_df["state"]))
+                    if len(type_keys) - keys_before < MIN_YIELD_PER_PAGE:
+                        stagnant += 1
+                    else:
+                        stagnant = 0
 
-                try:
-                    resp = requests.post(
-                        f"{USASPENDING_BASE_URL}/search/spending_by_award/",
-                        json=payload,
-                        timeout=60,
-                    )
-                    resp.raise_for_status()
-                    data = resp.json()
-                except requests.exceptions.HTTPError:
-                    if resp.status_code == 429:
-                        msg = "USAspending rate limited, waiting 30s..."
+                    if callback:
+                        progress(f"Fetching {type_label}: page {page} ({awards_seen} awards so far)", None)
+                    elif page % 10 == 0:
+                        print(f"  Page {page}, {awards_seen} awards so far")
+
+                    if not data.get("page_metadata", {}).get("hasNext", False):
+                        break
+                    if stagnant >= STAGNANT_PAGES:
+                        msg = f"{type_label}: few new recipients in the last {STAGNANT_PAGES} pages, stopping at page {page}"
                         if callback:
                             callback(msg, None)
                         else:
                             print(f"  {msg}")
-                        time.sleep(30)
-                        continue
-                    if callback:
-                        callback(f"API error: HTTP {resp.status_code}", None)
-                    else:
-                        print(f"  API error: HTTP {resp.status_code}")
-                    break
-                except Exception as e:
-                    if callback:
-                        callback(f"Request error: {e}", None)
-                    else:
-                        print(f"  Request error: {e}")
-                    break
-
-                awards = data.get("results", [])
-                if not awards:
-                    has_next = False
-                    break
-
-                page_meta = data.get("page_metadata", {})
-                has_next = page_meta.get("hasNext", False)
-
-                if callback:
-                    callback(f"Fetching {type_label}: page {page} ({len(seen_recipients)} unique so far)", None)
-                elif page % 10 == 0:
-                    print(f"  Page {page}, {len(seen_recipients)} unique recipients so far")
-
-                for award in awards:
-                    name = (award.get("Recipient Name") or "").strip()
-                    state = (award.get("Place of Performance State Code") or "").strip()
-                    if not name:
-                        continue
-
-                    key = (name.lower(), state)
-                    amount = award.get("Award Amount") or 0
-
-                    if key in seen_recipients:
-                        seen_recipients[key]["total_awards"] += float(amount) if amount else 0
-                        seen_recipients[key]["award_count"] += 1
-                        continue
-
-                    seen_recipients[key] = {
-                        "name": name,
-                        "state": state,
-                        "zip_code": (award.get("Place of Performance Zip5") or "").strip(),
-                        "biz_type": _TYPE_MAP.get(vet_type, "Veteran Owned Small Business"),
-                        "total_awards": float(amount) if amount else 0,
-                        "award_count": 1,
-                    }
-
-                page += 1
-                time.sleep(0.5)
+                        break
+
+                for _, future in pending:
+                    future.cancel()
 
         # Now upsert all unique recipients
-        total_recipients = len(seen_recipients)
+        recipients = _aggregate_recipients(award_frames)
+        total_recipients = len(recipients)
         result["unique_recipients"] = total_recipients
 
         if not callback:
             print(f"\nSaving {total_recipients} unique recipients...")
 
-        for i, ((name_lower, state), info) in enumerate(seen_recipients.items()):
-            if callback and i % 50 == 0:
-                pct = i / max(total_recipients, 1)
-                callback(f"Saving recipients: {i}/{total_recipients}", pct)
-            elif not callback and i % 500 == 0 and i > 0:
-                print(f"  Saved {i}/{total_recipients}")
-
-            awards_note = f"Federal contracts: ${info['total_awards']:,.0f} ({info['award_count']} awards)"
-
-            business = {
-                "legal_business_name": info["name"],
-                "state": info["state"],
-                "zip_code": info["zip_code"],
-                "business_type": info["biz_type"],
-                "source": SOURCE_USASPENDING,
-                "notes": awards_note,
-            }
-
-            geocode_business(business)
-            status = upsert_business_cross_source(business)
-            result["total_fetched"] += 1
-            if status == "new":
-                result["new"] += 1
-            elif status == "updated":
-                result["updated"] += 1
+        for start in range(0, total_recipients, SAVE_BATCH_SIZE):
+            if callback:
+                pct = start / max(total_recipients, 1)
+                progress(f"Saving recipients: {start}/{total_recipients}", pct)
+            elif start > 0:
+                print(f"  Saved {start}/{total_recipients}")
+
+            batch = []
+            for info in recipients.iloc[start:start + SAVE_BATCH_SIZE].itertuples(index=False):
+                awards_note = f"Federal contracts: ${info.total_awards:,.0f} ({info.award_count} awards)"
+                business = {
+                    "legal_business_name": info.name,
+                    "state": info.state,
+                    "zip_code": info.zip_code,
+                    "business_type": info.biz_type,
+                    "source": SOURCE_USASPENDING,
+                    "notes": awards_note,
+                }
+                geocode_business(business)
+                batch.append(business)
+
+            for status in upsert_businesses_cross_source(batch):
+                result["total_fetched"] += 1
+                if status == "new":
+                    result["new"] += 1
+                elif status == "updated":
+                    result["updated"] += 1
 
         complete_fetch_log(
             log_id, status="completed",
@@ -1,9 +1,96 @@
 """Yelp Fusion API enrichment for veteran-owned businesses."""
 
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
 import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # optional speedup; stdlib json is fine
+    import json
+    _json_loads = json.loads
+
 from config import YELP_API_KEY, YELP_API_BASE
 from database import get_connection, update_business_fields
 
+# Concurrent Yelp searches per batch
+MAX_WORKERS = 8
+
+# Candidates fetched per batch, as a multiple of batch_size; many small
+# contractors have no Yelp listing, so a batch keeps searching until it
+# has batch_size ratings or runs out of candidates
+CANDIDATE_POOL_FACTOR = 4
+
+# Minimum seconds between progress callbacks (each one redraws the UI)
+PROGRESS_INTERVAL = 0.1
+
+# How long a cached search result (including "not on Yelp") is trusted
+CACHE_DAYS = 30
+
+# yelp_cache key for a businesses row: normalized name|city|state
+_CACHE_KEY_SQL = "lower(trim(b.legal_business_name)) || '|' || lower(trim(b.city)) || '|' || upper(trim(b.state))"
+
+# Legal-entity suffixes Yelp listings rarely include ("Acme Roofing, L.L.C.")
+_SUFFIX_RE = re.compile(
+    r"[\s,]+(?:l\.?l\.?c\.?|p\.?l\.?l\.?c\.?|inc\.?|incorporated|corp\.?|corporation|ltd\.?|l\.?p\.?)$",
+    re.IGNORECASE,
+)
+# "Legal Name DBA Trade Name": the trade name is what Yelp lists
+_DBA_RE = re.compile(r"\s+d/?b/?a:?\s+(.+)$", re.IGNORECASE)
+
+# Shared session: one keep-alive connection pool and auth header for all searches
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_maxsize=MAX_WORKERS))
+_session.headers["Authorization"] = f"Bearer {YELP_API_KEY}"
+
+
+def _search_term(name):
+    """Yelp search term for a business name: the DBA name if present, minus LLC/Inc-style suffixes."""
+    term = name.strip()
+    dba = _DBA_RE.search(term)
+    if dba:
+        term = dba.group(1)
+    while True:
+        stripped = _SUFFIX_RE.sub("", term)
+        if stripped == term:
+            break
+        term = stripped
+    return term.rstrip(" ,") or name
+
+
+def _query_yelp(name, city, state):
+    """Run one Yelp search. Returns the rating dict, or None if no match.
+
+    Raises on network/HTTP errors so callers can tell a miss from a failure.
+    """
+    params = {
+        "term": _search_term(name),
+        "location": f"{city}, {state}",
+        "limit": 1,
+    }
+    resp = _session.get(
+        f"{YELP_API_BASE}/businesses/search",
+        params=params,
+        timeout=10,
+    )
+    resp.raise_for_status()
+    data = _json_loads(resp.content)
+    businesses = data.get("businesses", [])
+    if not businesses:
+        return None
+
+    biz = businesses[0]
+    return {
+        "yelp_rating": biz.get("rating"),
+        "yelp_review_count": biz.get("review_count", 0),
+        "yelp_url": biz.get("url", ""),
+    }
+
 
 def search_yelp(name, city, state):
     """Search Yelp for a business and return rating data.
@@ -12,74 +99,128 @@ def search_yelp(name, city, state):
     """
     if not YELP_API_KEY:
         return None
+    try:
+        return _query_yelp(name, city, state)
+    except Exception:
+        return None
 
-    headers = {"Authorization": f"Bearer {YELP_API_KEY}"}
-    params = {
-        "term": name,
-        "location": f"{city}, {state}",
-        "limit": 1,
-    }
 
+def _search_row(row):
+    """Pool worker: returns (result, ok); ok is False when the search failed."""
+    if not YELP_API_KEY:
+        return None, False
     try:
-        resp = requests.get(
-            f"{YELP_API_BASE}/businesses/search",
-            headers=headers,
-            params=params,
-            timeout=10,
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        businesses = data.get("businesses", [])
-        if not businesses:
-            return None
-
-        biz = businesses[0]
-        return {
-            "yelp_rating": biz.get("rating"),
-            "yelp_review_count": biz.get("review_count", 0),
-            "yelp_url": biz.get("url", ""),
-        }
+        return _query_yelp(row["legal_business_name"], row["city"], row["state"]), True
     except Exception:
-        return None
+        return None, False
+
+
+def _save_cache(results):
+    """Write (business_id, result) search outcomes to yelp_cache in one commit."""
+    if not results:
+        return
+    now = datetime.now().isoformat()
+    conn = get_connection()
+    cursor = conn.cursor()
+    for business_id, result in results:
+        result = result or {}
+        cursor.execute(f"""
+            INSERT OR REPLACE INTO yelp_cache
+                (key, yelp_rating, yelp_review_count, yelp_url, fetched_at)
+            SELECT {_CACHE_KEY_SQL}, ?, ?, ?, ?
+            FROM businesses b WHERE b.id = ?
+        """, (result.get("yelp_rating"), result.get("yelp_review_count"),
+              result.get("yelp_url"), now, business_id))
+    conn.commit()
+    conn.close()
 
 
 def run_yelp_enrichment_batch(batch_size=50, callback=None):
-    """Enrich businesses missing Yelp data.
+    """Enrich up to batch_size businesses missing Yelp data.
 
+    Searches at most CANDIDATE_POOL_FACTOR * batch_size candidates and stops
+    early once batch_size of them have been enriched. Results cached within
+    CACHE_DAYS are reused: cached ratings are applied without a search, and
+    businesses recently found not to be on Yelp are not candidates.
     Returns dict with total_processed, enriched, skipped counts.
     """
+    cutoff = (datetime.now() - timedelta(days=CACHE_DAYS)).isoformat()
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute("""
-        SELECT id, legal_business_name, city, state
-        FROM businesses
-        WHERE yelp_rating IS NULL
-          AND legal_business_name IS NOT NULL AND legal_business_name != ''
-          AND city IS NOT NULL AND city != ''
-          AND state IS NOT NULL AND state != ''
+    cursor.execute(f"""
+        SELECT b.id, b.legal_business_name, b.city, b.state,
+               c.yelp_rating AS cached_rating,
+               c.yelp_review_count AS cached_review_count,
+               c.yelp_url AS cached_url
+        FROM businesses b
+        LEFT JOIN yelp_cache c
+          ON c.key = {_CACHE_KEY_SQL} AND c.fetched_at >= ?
+        WHERE b.yelp_rating IS NULL
+          AND b.legal_business_name IS NOT NULL AND b.legal_business_name != ''
+          AND b.city IS NOT NULL AND b.city != ''
+          AND b.state IS NOT NULL AND b.state != ''
+          AND (c.key IS NULL OR c.yelp_rating IS NOT NULL)
         LIMIT ?
-    """, (batch_size,))
-    rows = [dict(r) for r in cursor.fetchall()]
+    """, (cutoff, batch_size * CANDIDATE_POOL_FACTOR))
+    candidates = [dict(r) for r in cursor.fetchall()]
     conn.close()
 
-    total = len(rows)
+    processed = 0
     enriched = 0
     skipped = 0
 
-    for i, row in enumerate(rows):
-        if callback:
-            pct = (i + 1) / total if total > 0 else 1.0
-            callback(f"Searching Yelp for {row['legal_business_name']}...", pct)
+    last_report = 0.0
+
+    def report(row):
+        # At most one UI update per PROGRESS_INTERVAL
+        nonlocal last_report
+        now = time.monotonic()
+        if callback and now - last_report >= PROGRESS_INTERVAL:
+            last_report = now
+            callback(f"Searched Yelp for {row['legal_business_name']}",
+                     enriched / batch_size if batch_size > 0 else 1.0)
 
-        result = search_yelp(row["legal_business_name"], row["city"], row["state"])
-        if result and result.get("yelp_rating") is not None:
-            update_business_fields(row["id"], result)
+    # Cache hits first: same business name/city/state seen in an earlier run
+    to_search = []
+    for row in candidates:
+        if row["cached_rating"] is None:
+            to_search.append(row)
+        elif enriched < batch_size:
+            update_business_fields(row["id"], {
+                "yelp_rating": row["cached_rating"],
+                "yelp_review_count": row["cached_review_count"],
+                "yelp_url": row["cached_url"],
+            })
+            processed += 1
             enriched += 1
-        else:
-            skipped += 1
+            report(row)
+
+    # Searches run on the pool; DB writes stay on this thread. Each wave only
+    # searches as many candidates as there are ratings still needed.
+    searched = []
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        pos = 0
+        while enriched < batch_size and pos < len(to_search):
+            wave = to_search[pos:pos + batch_size - enriched]
+            pos += len(wave)
+            processed += len(wave)
+            futures = {pool.submit(_search_row, row): row for row in wave}
+            for future in as_completed(futures):
+                row = futures[future]
+                result, ok = future.result()
+                if ok:
+                    searched.append((row["id"], result))
+                if result and result.get("yelp_rating") is not None:
+                    update_business_fields(row["id"], result)
+                    enriched += 1
+                else:
+                    skipped += 1
+                report(row)
+
+    _save_cache(searched)
 
     return {
-        "total_processed": total,
+        "total_processed": processed,
         "enriched": enriched,
         "skipped": skipped,
     }